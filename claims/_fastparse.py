@@ -0,0 +1,14 @@
+"""Fast parsers for the fixed formats used in claim data files"""
+from datetime import date
+
+
+def parse_iso_date(value):
+    """
+    Parse a zero-padded YYYY-MM-DD string without going through strptime.
+    Stricter than '%Y-%m-%d', which also accepts unpadded dates like 2022-1-5;
+    callers fall back to strptime when this raises.
+    """
+    # fromisoformat is implemented in C; the shape check rejects what it would accept beyond YYYY-MM-DD
+    if len(value) != 10 or value[4] != '-' or value[7] != '-':
+        raise ValueError(f"time data '{value}' does not match format '%Y-%m-%d'")
+    return date.fromisoformat(value)
@@ -1,16 +1,46 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.db.models.functions import Substr
+from django.utils.functional import cached_property
 from .models import Claim, ClaimDetail, Flag, Note
+from .utils import COUNT_ESTIMATE_THRESHOLD, estimate_row_count
+
+
+class FasterAdminPaginator(Paginator):
+    """Paginator that reads the planner's row estimate instead of COUNT(*) on large unfiltered tables"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, using=queryset.db)
+            if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
 
 
 # Register your models here.
 @admin.register(Claim)
 class ClaimAdmin(admin.ModelAdmin):
-    list_display = ('id', 'patient_name', 'billed_amount', 'paid_amount', 'status', 'insurer_name', 'discharge_date')
+    list_display = ('id', 'patient_name', 'billed_amount', 'paid_amount', 'status', 'insurer_name', 'discharge_date', 'flag_count', 'note_count')
     list_filter = ('status', 'insurer_name', 'discharge_date')
     search_fields = ('id', 'patient_name', 'insurer_name')
     readonly_fields = ('id',)
     ordering = ('-id',)
     list_per_page = 50
+    paginator = FasterAdminPaginator
+    # Skip the unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Note count in the same query instead of one per row; flag_count is a column on Claim
+        return super().get_queryset(request).annotate(note_count=Count('notes'))
+
+    def note_count(self, obj):
+        return obj.note_count
+    note_count.short_description = "Notes"
+    note_count.admin_order_field = 'note_count'
 
 
 @admin.register(ClaimDetail)
@@ -18,6 +48,7 @@ class ClaimDetailAdmin(admin.ModelAdmin):
     list_display = ('claim', 'cpt_codes', 'denial_reason')
     search_fields = ('claim__id', 'claim__patient_name', 'cpt_codes')
     list_filter = ('claim__status',)
+    list_select_related = ('claim',)
 
 
 @admin.register(Flag)
@@ -26,6 +57,9 @@ class FlagAdmin(admin.ModelAdmin):
     list_filter = ('created_at', 'user')
     ordering = ('-created_at',)
     search_fields = ('claim__id', 'claim__patient_name', 'user__username')
+    list_select_related = ('claim', 'user')
+    paginator = FasterAdminPaginator
+    show_full_result_count = False
 
 
 @admin.register(Note)
@@ -34,7 +68,17 @@ class NoteAdmin(admin.ModelAdmin):
     list_filter = ('created_at', 'user')
     search_fields = ('claim__id', 'claim__patient_name', 'user__username', 'text')
     ordering = ('-created_at',)
+    list_select_related = ('claim', 'user')
+    paginator = FasterAdminPaginator
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        # Only the first 51 characters are needed to render (and truncate) the preview
+        return super().get_queryset(request).defer('text').annotate(
+            text_preview_db=Substr('text', 1, 51),
+        )
     
     def text_preview(self, obj):
-        return obj.text[:50] + "..." if len(obj.text) > 50 else obj.text
+        preview = obj.text_preview_db
+        return preview[:50] + "..." if len(preview) > 50 else preview
     text_preview.short_description = "Note Preview"
\ No newline at end of file
@@ -1,12 +1,11 @@
 from django.shortcuts import render, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.http import HttpResponse
-from datetime import datetime
-import json
-from .models import Claim, ClaimDetail, Flag, Note
+from django.http import StreamingHttpResponse
 from .forms import DataUploadForm
-from .utils import DataImporter, export_claims_to_json, export_claims_to_csv
+from .utils import (
+    DataImporter, export_claims_to_json, export_claims_to_csv, export_claim_details_to_csv, get_data_counts,
+)
 
 
 @staff_member_required
@@ -39,11 +38,13 @@ def data_upload_view(request):
                 )
                 
                 if results['errors']:
-                    success_msg += f" {len(results['errors'])} errors occurred."
+                    # Only the first DataImporter.MAX_ERRORS are kept; the rest are counted
+                    error_count = len(results['errors']) + results['errors_truncated']
+                    success_msg += f" {error_count} errors occurred."
                     for error in results['errors'][:5]:  # Show first 5 errors
                         messages.warning(request, f"Error: {error}")
-                    if len(results['errors']) > 5:
-                        messages.warning(request, f"... and {len(results['errors']) - 5} more errors.")
+                    if error_count > 5:
+                        messages.warning(request, f"... and {error_count - 5} more errors.")
                 
                 messages.success(request, success_msg)
                 return redirect('data_admin_upload')
@@ -54,20 +55,12 @@ def data_upload_view(request):
         form = DataUploadForm()
     
     # Get current data statistics
-    claims_count = Claim.objects.count()
-    details_count = ClaimDetail.objects.count()
-    flags_count = Flag.objects.count()
-    notes_count = Note.objects.count()
-    
     context = {
         'form': form,
         'title': 'Upload Claims Data',
         'opts': {'app_label': 'claims'},
         'has_permission': True,
-        'claims_count': claims_count,
-        'details_count': details_count,
-        'flags_count': flags_count,
-        'notes_count': notes_count,
+        **get_data_counts(),
         'site_header': 'Claims Data Management',
         'site_title': 'Claims Admin',
     }
@@ -79,32 +72,18 @@ def data_export_view(request):
     """Handle data export"""
     export_format = request.GET.get('format', 'json')
     
+    # Stream the export so large tables never sit in memory as one string
     if export_format == 'json':
-        claims_data, details_data = export_claims_to_json()
-        
-        export_data = {
-            'claims': claims_data,
-            'claim_details': details_data,
-            'export_date': str(datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
-            'total_claims': len(claims_data),
-            'total_details': len(details_data)
-        }
-        
-        response = HttpResponse(
-            json.dumps(export_data, indent=2),
-            content_type='application/json'
-        )
+        response = StreamingHttpResponse(export_claims_to_json(), content_type='application/json')
         response['Content-Disposition'] = 'attachment; filename="claims_export.json"'
         return response
     
     else:  # CSV
-        claims_csv, details_csv = export_claims_to_csv()
-        
         if request.GET.get('type') == 'details':
-            response = HttpResponse(details_csv, content_type='text/csv')
+            response = StreamingHttpResponse(export_claim_details_to_csv(), content_type='text/csv')
             response['Content-Disposition'] = 'attachment; filename="claim_details_export.csv"'
         else:
-            response = HttpResponse(claims_csv, content_type='text/csv')
+            response = StreamingHttpResponse(export_claims_to_csv(), content_type='text/csv')
             response['Content-Disposition'] = 'attachment; filename="claims_export.csv"'
         
         return response
@@ -114,17 +93,9 @@ def data_export_view(request):
 def data_management_dashboard(request):
     """Data management dashboard view"""
     # Get current data statistics
-    claims_count = Claim.objects.count()
-    details_count = ClaimDetail.objects.count()
-    flags_count = Flag.objects.count()
-    notes_count = Note.objects.count()
-    
     context = {
         'title': 'Claims Data Management',
-        'claims_count': claims_count,
-        'details_count': details_count,
-        'flags_count': flags_count,
-        'notes_count': notes_count,
+        **get_data_counts(),
         'site_header': 'Claims Data Management',
         'site_title': 'Claims Admin',
         'has_permission': True,
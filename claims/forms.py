@@ -1,7 +1,43 @@
 from django import forms
-import json
 import csv
-import io
+import ijson
+
+
+# Validation only looks at the start of an upload; the importer reads the rest
+SAMPLE_SIZE = 4096
+
+
+def read_sample(file, size=SAMPLE_SIZE):
+    """Read the first bytes of an upload, leaving it rewound"""
+    file.seek(0)
+    try:
+        return file.read(size)
+    finally:
+        file.seek(0)
+
+
+def read_csv_header(file):
+    """Read only the header row of a pipe-delimited CSV upload from its first few KB"""
+    sample = read_sample(file)
+    if b'\0' in sample:
+        raise forms.ValidationError('File does not appear to be a text file.')
+    
+    header_line, newline, _ = sample.partition(b'\n')
+    if not newline and len(sample) == SAMPLE_SIZE:
+        raise forms.ValidationError(f'Header row not found in the first {SAMPLE_SIZE // 1024} KB of the file.')
+    return next(csv.reader([header_line.rstrip(b'\r').decode('utf-8')], delimiter='|'), [])
+
+
+def read_first_json_item(file):
+    """Parse only the first element of a JSON array upload"""
+    # Anything other than an array is rejected without handing it to the parser
+    if not read_sample(file).lstrip().startswith(b'['):
+        return None
+    file.seek(0)
+    try:
+        return next(ijson.items(file, 'item'), None)
+    finally:
+        file.seek(0)
 
 
 class DataUploadForm(forms.Form):
@@ -57,30 +93,24 @@ class DataUploadForm(forms.Form):
         elif file_type == 'json' and not file.name.lower().endswith('.json'):
             raise forms.ValidationError('Please upload a JSON file when JSON format is selected.')
         
-        # Validate file content
+        # Validate file content; only the header row / first object is read
         try:
             if file_type == 'csv':
-                content = file.read().decode('utf-8')
-                file.seek(0)  # Reset for later use
-                reader = csv.DictReader(io.StringIO(content), delimiter='|')
-                headers = reader.fieldnames
+                headers = read_csv_header(file)
                 required_headers = ['id', 'patient_name', 'billed_amount', 'paid_amount', 'status', 'insurer_name', 'discharge_date']
-                missing_headers = set(required_headers) - set(headers or [])
+                missing_headers = set(required_headers) - set(headers)
                 if missing_headers:
                     raise forms.ValidationError(f'Missing required columns: {", ".join(missing_headers)}')
             else:  # JSON
-                content = file.read().decode('utf-8')
-                file.seek(0)  # Reset for later use
-                data = json.loads(content)
-                if not isinstance(data, list) or not data:
+                first_item = read_first_json_item(file)
+                if first_item is None:
                     raise forms.ValidationError('JSON file must contain a list of claim objects.')
                 # Check first item for required fields
-                first_item = data[0]
                 required_fields = ['id', 'patient_name', 'billed_amount', 'paid_amount', 'status', 'insurer_name', 'discharge_date']
                 missing_fields = set(required_fields) - set(first_item.keys())
                 if missing_fields:
                     raise forms.ValidationError(f'Missing required fields in JSON: {", ".join(missing_fields)}')
-        except json.JSONDecodeError:
+        except ijson.JSONError:
             raise forms.ValidationError('Invalid JSON file format.')
         except UnicodeDecodeError:
             raise forms.ValidationError('File encoding error. Please use UTF-8 encoding.')
@@ -99,30 +129,24 @@ class DataUploadForm(forms.Form):
         
         file_type = self.cleaned_data.get('file_type', 'csv')
         
-        # Validate file content
+        # Validate file content; only the header row / first object is read
         try:
             if file_type == 'csv':
-                content = file.read().decode('utf-8')
-                file.seek(0)  # Reset for later use
-                reader = csv.DictReader(io.StringIO(content), delimiter='|')
-                headers = reader.fieldnames
+                headers = read_csv_header(file)
                 required_headers = ['claim_id', 'cpt_codes']
-                missing_headers = set(required_headers) - set(headers or [])
+                missing_headers = set(required_headers) - set(headers)
                 if missing_headers:
                     raise forms.ValidationError(f'Missing required columns in details file: {", ".join(missing_headers)}')
             else:  # JSON
-                content = file.read().decode('utf-8')
-                file.seek(0)  # Reset for later use
-                data = json.loads(content)
-                if not isinstance(data, list) or not data:
+                first_item = read_first_json_item(file)
+                if first_item is None:
                     raise forms.ValidationError('JSON details file must contain a list of detail objects.')
                 # Check first item for required fields
-                first_item = data[0]
                 required_fields = ['claim_id', 'cpt_codes']
                 missing_fields = set(required_fields) - set(first_item.keys())
                 if missing_fields:
                     raise forms.ValidationError(f'Missing required fields in details JSON: {", ".join(missing_fields)}')
-        except json.JSONDecodeError:
+        except ijson.JSONError:
             raise forms.ValidationError('Invalid JSON format in details file.')
         except UnicodeDecodeError:
             raise forms.ValidationError('File encoding error in details file. Please use UTF-8 encoding.')
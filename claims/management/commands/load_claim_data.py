@@ -1,13 +1,126 @@
 import csv
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from decimal import Decimal
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from claims.models import Claim, ClaimDetail
+from django.db import connection, transaction
+from claims.models import POSTGRES_CLAIM_INDEXES, Claim, ClaimDetail
+from claims.utils import invalidate_claim_counts, truncate_claims_data
+from claims._fastparse import parse_iso_date
+
+
+def split_file(file_path, parts):
+    """Split the rows after the header into byte ranges that start and end on line boundaries"""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as file:
+        file.readline()
+        offsets = [file.tell()]
+        for part in range(1, parts):
+            file.seek(offsets[0] + (size - offsets[0]) * part // parts)
+            file.readline()
+            offsets.append(max(file.tell(), offsets[-1]))
+    offsets.append(size)
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
+
+
+def parse_date(value):
+    """Parse a discharge date, falling back to strptime for unpadded dates like 2022-1-5"""
+    try:
+        return parse_iso_date(value)
+    except ValueError:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def copy_lines(file, extra_field=False):
+    """
+    Yield the lines of a pipe-delimited CSV for COPY, without the blank lines COPY rejects.
+    With extra_field, an empty trailing field is added to every record (the header included).
+    """
+    in_quotes = False
+    for line in file:
+        if not in_quotes and not line.strip('\r\n'):
+            continue
+        # An odd number of quotes opens or closes a field that continues on the next line
+        if line.count('"') % 2:
+            in_quotes = not in_quotes
+        if extra_field and not in_quotes:
+            line = line.rstrip('\r\n') + '|\n'
+        yield line
+
+
+def join_chunks(lines, size=64 * 1024):
+    """Join lines into strings of roughly size characters"""
+    buffer = []
+    length = 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+class ChunkReader:
+    """Minimal file object over an iterator of strings, for psycopg2's copy_expert"""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+    
+    def read(self, size=-1):
+        return next(self.chunks, '')
+
+
+def parse_claim_rows(file_path, start, end):
+    """Parse the claim rows in a byte range of the file into tuples ordered like Command.CLAIM_COLUMNS"""
+    with open(file_path, 'rb') as file:
+        header = next(csv.reader([file.readline().decode('utf-8')], delimiter='|'), [])
+        file.seek(start)
+        data = file.read(end - start).decode('utf-8')
+    
+    idx = {name: i for i, name in enumerate(header)}
+    id_col = idx['id']
+    patient_col = idx['patient_name']
+    billed_col = idx['billed_amount']
+    paid_col = idx['paid_amount']
+    status_col = idx['status']
+    insurer_col = idx['insurer_name']
+    date_col = idx['discharge_date']
+    burger_col = idx.get('burger_combo_code')
+    
+    return [
+        (
+            int(row[id_col]),
+            row[patient_col],
+            Decimal(row[billed_col]),
+            Decimal(row[paid_col]),
+            row[status_col],
+            row[insurer_col],
+            parse_date(row[date_col]),
+            row[burger_col] if burger_col is not None else '',
+        )
+        for row in csv.reader(io.StringIO(data), delimiter='|')
+        if row
+    ]
 
 
 class Command(BaseCommand):
     help = 'Load claims data from CSV files'
+    
+    # Rows written per INSERT statement
+    BATCH_SIZE = 1000
+    # Columns accepted in the CSV headers for the COPY fast path
+    CLAIM_COLUMNS = (
+        'id', 'patient_name', 'billed_amount', 'paid_amount', 'status',
+        'insurer_name', 'discharge_date', 'burger_combo_code',
+    )
+    DETAIL_COLUMNS = ('id', 'claim_id', 'cpt_codes', 'denial_reason')
+    # COPY reads empty fields as NULL; the Python path stores '' in these columns
+    CLAIM_TEXT_COLUMNS = ('patient_name', 'status', 'insurer_name', 'burger_combo_code')
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -32,12 +145,19 @@ class Command(BaseCommand):
             action='store_true',
             help='Delete all existing claims data before importing',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes used to parse the claims CSV (0 for one per CPU)',
+        )
 
     def handle(self, *args, **options):
         claims_file = options['claims_file']
         details_file = options['details_file']
         append = options['append']
         overwrite = options['overwrite']
+        workers = options['workers'] or os.cpu_count() or 1
 
         # Validate file existence
         if not os.path.exists(claims_file):
@@ -50,97 +170,240 @@ class Command(BaseCommand):
             with transaction.atomic():
                 if overwrite:
                     self.stdout.write('Deleting existing claims data...')
-                    ClaimDetail.objects.all().delete()
-                    Claim.objects.all().delete()
+                    truncate_claims_data()
                     self.stdout.write(self.style.SUCCESS('Existing data deleted.'))
 
-                # Load claims data
-                self.stdout.write('Loading claims data...')
-                claims_loaded = self.load_claims(claims_file, append)
-                
-                # Load claim details
-                self.stdout.write('Loading claim details...')
-                details_loaded = self.load_claim_details(details_file, append)
+                if overwrite and connection.vendor == 'postgresql':
+                    # Fresh load: stream the files straight into Postgres with
+                    # secondary indexes dropped, then build them once at the end
+                    with connection.schema_editor(atomic=False) as schema_editor:
+                        self.drop_indexes(schema_editor)
+                        
+                        self.stdout.write('Loading claims data via COPY...')
+                        claims_loaded = self.copy_claims(claims_file)
+                        
+                        self.stdout.write('Loading claim details via COPY...')
+                        details_loaded = self.copy_claim_details(details_file)
+                        
+                        self.stdout.write('Rebuilding indexes...')
+                        self.create_indexes(schema_editor)
+                else:
+                    # Load claims data
+                    self.stdout.write('Loading claims data...')
+                    claims_loaded = self.load_claims(claims_file, append, workers)
+                    
+                    # Load claim details
+                    self.stdout.write('Loading claim details...')
+                    details_loaded = self.load_claim_details(details_file, append)
                 
                 self.stdout.write(
                     self.style.SUCCESS(
                         f'Successfully loaded {claims_loaded} claims and {details_loaded} claim details.'
                     )
                 )
+            
+            invalidate_claim_counts()
 
         except Exception as e:
             raise CommandError(f'Error loading data: {str(e)}')
 
-    def load_claims(self, file_path, append=False):
+    def bulk_load_indexes(self):
+        """(model, index) pairs for the Meta.indexes and PostgreSQL-only indexes of the bulk-loaded tables"""
+        for model in (Claim, ClaimDetail):
+            for index in model._meta.indexes:
+                yield model, index
+        for index in POSTGRES_CLAIM_INDEXES:
+            yield Claim, index
+
+    def drop_indexes(self, schema_editor):
+        """Drop the secondary indexes of the bulk-loaded tables so inserts skip index maintenance"""
+        for model, index in self.bulk_load_indexes():
+            schema_editor.remove_index(model, index)
+
+    def create_indexes(self, schema_editor):
+        """Recreate the indexes removed by drop_indexes"""
+        for model, index in self.bulk_load_indexes():
+            schema_editor.add_index(model, index)
+
+    def load_claims(self, file_path, append=False, workers=1):
         loaded_count = 0
+        batch = []
+        rows = self.parse_claims(file_path, workers)
         
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, delimiter='|')
+        # Look up every existing claim id in the file up front
+        existing_ids = set() if append else self.existing_claim_ids(row[0] for row in rows)
+        
+        for row in rows:
+            # Skip if not appending and claim exists
+            if row[0] in existing_ids:
+                continue
             
-            for row in reader:
-                claim_id = int(row['id'])
-                
-                # Skip if not appending and claim exists
-                if not append and Claim.objects.filter(id=claim_id).exists():
-                    continue
-                
-                # Parse date
-                discharge_date = datetime.strptime(row['discharge_date'], '%Y-%m-%d').date()
-                
-                # Create or update claim
-                claim, created = Claim.objects.get_or_create(
-                    id=claim_id,
-                    defaults={
-                        'patient_name': row['patient_name'],
-                        'billed_amount': float(row['billed_amount']),
-                        'paid_amount': float(row['paid_amount']),
-                        'status': row['status'],
-                        'insurer_name': row['insurer_name'],
-                        'discharge_date': discharge_date,
-                        'burger_combo_code': row.get('burger_combo_code', ''),
-                    }
-                )
-                
-                if created or append:
-                    loaded_count += 1
-                    if loaded_count % 100 == 0:
-                        self.stdout.write(f'Loaded {loaded_count} claims...')
+            batch.append(Claim(**dict(zip(self.CLAIM_COLUMNS, row))))
+            
+            if len(batch) >= self.BATCH_SIZE:
+                loaded_count += self.save_claims(batch)
+                batch = []
+                self.stdout.write(f'Loaded {loaded_count} claims...')
         
+        loaded_count += self.save_claims(batch)
         return loaded_count
 
+    def parse_claims(self, file_path, workers=1):
+        """Parse the claims CSV, splitting it across worker processes when asked to"""
+        ranges = split_file(file_path, workers)
+        if workers <= 1 or len(ranges) <= 1:
+            return [row for start, end in ranges for row in parse_claim_rows(file_path, start, end)]
+        
+        # Workers only parse; every database write stays on this process's connection
+        self.stdout.write(f'Parsing claims with {len(ranges)} worker processes...')
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            chunks = executor.map(parse_claim_rows, [file_path] * len(ranges), *zip(*ranges))
+            return [row for chunk in chunks for row in chunk]
+
+    def existing_claim_ids(self, claim_ids):
+        """Return which of the given ids already exist"""
+        claim_ids = list(claim_ids)
+        existing_ids = set()
+        # A single query unless the backend caps the number of query parameters (SQLite)
+        chunk_size = max(connection.ops.bulk_batch_size(['id'], claim_ids), 1)
+        for start in range(0, len(claim_ids), chunk_size):
+            existing_ids.update(
+                Claim.objects.filter(id__in=claim_ids[start:start + chunk_size]).values_list('id', flat=True)
+            )
+        return existing_ids
+
+    def save_claims(self, batch):
+        """Insert a batch of claims, leaving existing claims untouched"""
+        Claim.objects.bulk_create(batch, batch_size=self.BATCH_SIZE, ignore_conflicts=True)
+        return len(batch)
+
     def load_claim_details(self, file_path, append=False):
         loaded_count = 0
+        batch = []
         
         with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, delimiter='|')
-            
-            for row in reader:
-                claim_id = int(row['claim_id'])
-                
-                try:
-                    claim = Claim.objects.get(id=claim_id)
-                except Claim.DoesNotExist:
-                    self.stdout.write(
-                        self.style.WARNING(f'Claim {claim_id} not found, skipping detail record.')
-                    )
-                    continue
-                
-                # Skip if not appending and detail exists
-                if not append and hasattr(claim, 'details'):
-                    continue
-                
-                # Create or update claim detail
-                detail, created = ClaimDetail.objects.get_or_create(
-                    claim=claim,
-                    defaults={
-                        'cpt_codes': row['cpt_codes'],
-                        'denial_reason': row.get('denial_reason', '') or None,
-                    }
+            reader = csv.reader(file, delimiter='|')
+            idx = {name: i for i, name in enumerate(next(reader, []))}
+            # Skip blank lines, e.g. a trailing newline at the end of the file
+            rows = [row for row in reader if row]
+        
+        claim_col = idx['claim_id']
+        cpt_col = idx['cpt_codes']
+        denial_col = idx.get('denial_reason')
+        
+        # One query each for the referenced claims that exist and the ones that already have details
+        csv_claim_ids = {int(row[claim_col]) for row in rows}
+        claim_ids = self.existing_claim_ids(csv_claim_ids)
+        detail_claim_ids = set() if append else set(ClaimDetail.objects.values_list('claim_id', flat=True))
+        
+        missing_ids = csv_claim_ids - claim_ids
+        if missing_ids:
+            sample = ', '.join(str(claim_id) for claim_id in sorted(missing_ids)[:10])
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{len(missing_ids)} claims not found, skipping their detail records: {sample}'
+                    + (', ...' if len(missing_ids) > 10 else '')
                 )
-                
-                if created or append:
-                    loaded_count += 1
-                    if loaded_count % 100 == 0:
-                        self.stdout.write(f'Loaded {loaded_count} claim details...')
+            )
+        
+        for row in rows:
+            claim_id = int(row[claim_col])
+            
+            # Skip details for missing claims, and existing details unless appending
+            if claim_id not in claim_ids or claim_id in detail_claim_ids:
+                continue
+            
+            batch.append(ClaimDetail(
+                claim_id=claim_id,
+                cpt_codes=row[cpt_col],
+                denial_reason=(row[denial_col] if denial_col is not None else '') or None,
+            ))
+            
+            if len(batch) >= self.BATCH_SIZE:
+                loaded_count += self.save_claim_details(batch)
+                batch = []
+                self.stdout.write(f'Loaded {loaded_count} claim details...')
+        
+        loaded_count += self.save_claim_details(batch)
+        return loaded_count
+
+    def save_claim_details(self, batch):
+        """Insert a batch of details; existing details are never overwritten, so conflicting rows are dropped"""
+        ClaimDetail.objects.bulk_create(batch, batch_size=self.BATCH_SIZE, ignore_conflicts=True)
+        return len(batch)
+
+    def read_header(self, file_path, allowed_columns):
+        """Return the CSV header, rejecting columns the target table doesn't have"""
+        with open(file_path, 'r', encoding='utf-8') as file:
+            header = next(csv.reader(file, delimiter='|'), [])
+        
+        unknown = [column for column in header if column not in allowed_columns]
+        if unknown:
+            raise CommandError(f'Unexpected columns in "{file_path}": {", ".join(unknown)}')
+        return header
+
+    def copy_from_file(self, cursor, sql, file_path, extra_field=False):
+        """Run COPY ... FROM STDIN with the lines of the given file (see copy_lines) as input"""
+        with open(file_path, 'r', encoding='utf-8', newline='') as file:
+            chunks = join_chunks(copy_lines(file, extra_field))
+            if hasattr(cursor, 'copy_expert'):
+                # psycopg2
+                cursor.copy_expert(sql, ChunkReader(chunks))
+            else:
+                # psycopg 3
+                with cursor.copy(sql) as copy:
+                    for chunk in chunks:
+                        copy.write(chunk)
+
+    def copy_claims(self, file_path):
+        """Load claims with COPY; Postgres parses the numeric and date columns itself"""
+        quote = connection.ops.quote_name
+        header = self.read_header(file_path, self.CLAIM_COLUMNS)
+        # Without the column every claim would get NULL; stream an empty field instead
+        add_burger_combo_code = 'burger_combo_code' not in header
+        if add_burger_combo_code:
+            header.append('burger_combo_code')
+        columns = ', '.join(quote(column) for column in header)
+        not_null = ', '.join(quote(column) for column in header if column in self.CLAIM_TEXT_COLUMNS)
+        
+        with connection.cursor() as cursor:
+            self.copy_from_file(
+                cursor,
+                f"COPY {quote(Claim._meta.db_table)} ({columns}) "
+                f"FROM STDIN WITH (FORMAT csv, DELIMITER '|', HEADER true, FORCE_NOT_NULL ({not_null}))",
+                file_path,
+                extra_field=add_burger_combo_code,
+            )
+            return cursor.rowcount
+
+    def copy_claim_details(self, file_path):
+        """Load details with COPY into a staging table, then keep rows whose claim exists"""
+        quote = connection.ops.quote_name
+        header = self.read_header(file_path, self.DETAIL_COLUMNS)
+        staging = 'claim_detail_staging'
+        columns = ', '.join(quote(column) for column in header)
+        column_defs = ', '.join(f'{quote(column)} text' for column in header)
+        denial_reason = "NULLIF(s.denial_reason, '')" if 'denial_reason' in header else 'NULL'
+        
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE TEMP TABLE {staging} ({column_defs}) ON COMMIT DROP")
+            self.copy_from_file(
+                cursor,
+                f"COPY {staging} ({columns}) "
+                f"FROM STDIN WITH (FORMAT csv, DELIMITER '|', HEADER true)",
+                file_path,
+            )
+            staged_count = cursor.rowcount
+            
+            cursor.execute(
+                f"INSERT INTO {quote(ClaimDetail._meta.db_table)} (claim_id, cpt_codes, denial_reason) "
+                f"SELECT DISTINCT ON (s.claim_id::integer) s.claim_id::integer, COALESCE(s.cpt_codes, ''), {denial_reason} "
+                f"FROM {staging} s JOIN {quote(Claim._meta.db_table)} c ON c.id = s.claim_id::integer"
+            )
+            loaded_count = cursor.rowcount
         
+        if staged_count > loaded_count:
+            self.stdout.write(
+                self.style.WARNING(f'Skipped {staged_count - loaded_count} detail records without a matching claim.')
+            )
         return loaded_count
@@ -0,0 +1,36 @@
+from django.db.migrations.operations.base import Operation
+
+
+class PostgresOnly(Operation):
+    """
+    Apply the wrapped operation's schema change only on PostgreSQL.
+
+    The migration state is always updated. Wrap index DDL in a
+    SeparateDatabaseAndState without state operations, so the index never
+    reaches the model state and SQLite table rebuilds do not recreate it.
+    """
+    reduces_to_sql = False
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def deconstruct(self):
+        return self.__class__.__qualname__, [self.operation], {}
+
+    @property
+    def reversible(self):
+        return self.operation.reversible
+
+    def state_forwards(self, app_label, state):
+        self.operation.state_forwards(app_label, state)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.operation.database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.operation.database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f"{self.operation.describe()} (PostgreSQL only)"
@@ -0,0 +1,45 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+from claims.migration_operations import PostgresOnly
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0002_add_indexes_and_constraints'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='claim',
+            name='claims_clai_id_a7862d_idx',
+        ),
+        PostgresOnly(
+            migrations.RunSQL(
+                'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+                reverse_sql=migrations.RunSQL.noop,
+            ),
+        ),
+        PostgresOnly(
+            migrations.SeparateDatabaseAndState(
+                database_operations=[
+                    migrations.AddIndex(
+                        model_name='claim',
+                        index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('patient_name'), name='gin_trgm_ops'), name='claim_patient_trgm'),
+                    ),
+                ],
+            ),
+        ),
+        PostgresOnly(
+            migrations.SeparateDatabaseAndState(
+                database_operations=[
+                    migrations.AddIndex(
+                        model_name='claim',
+                        index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('insurer_name'), name='gin_trgm_ops'), name='claim_insurer_trgm'),
+                    ),
+                ],
+            ),
+        ),
+    ]
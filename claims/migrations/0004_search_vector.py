@@ -0,0 +1,55 @@
+# Generated by Django 4.2.24 on 2026-10-14 05:02
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from claims.migration_operations import PostgresOnly
+
+
+# Fires on INSERT, ON CONFLICT DO UPDATE and COPY, so every import path keeps the vector current
+# 'simple' neither stems nor drops stopwords: names like "An" or "Rhodes" stay searchable while typing
+CREATE_TRIGGER = """
+CREATE TRIGGER claim_search_vector_update
+BEFORE INSERT OR UPDATE OF patient_name, insurer_name, search_vector ON claims_claim
+FOR EACH ROW EXECUTE FUNCTION
+tsvector_update_trigger(search_vector, 'pg_catalog.simple', patient_name, insurer_name);
+"""
+
+DROP_TRIGGER = 'DROP TRIGGER IF EXISTS claim_search_vector_update ON claims_claim;'
+
+BACKFILL = """
+UPDATE claims_claim SET search_vector =
+to_tsvector('pg_catalog.simple', coalesce(patient_name, '') || ' ' || coalesce(insurer_name, ''));
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0003_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claim',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        PostgresOnly(
+            migrations.RunSQL(CREATE_TRIGGER, reverse_sql=DROP_TRIGGER),
+        ),
+        PostgresOnly(
+            migrations.RunSQL(BACKFILL, reverse_sql=migrations.RunSQL.noop),
+        ),
+        PostgresOnly(
+            migrations.SeparateDatabaseAndState(
+                database_operations=[
+                    migrations.AddIndex(
+                        model_name='claim',
+                        index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='claim_search_vector_gin'),
+                    ),
+                ],
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.24 on 2026-10-14 05:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0004_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['status', '-id'], name='claim_status_id_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='claim',
+            name='claims_clai_status_b4f911_idx',
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.24 on 2026-10-14 05:06
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def rebuild_flag_counts(apps, schema_editor):
+    Claim = apps.get_model('claims', 'Claim')
+    Flag = apps.get_model('claims', 'Flag')
+    counts = Flag.objects.filter(claim=OuterRef('pk')).order_by().values('claim').annotate(
+        count=Count('id'),
+    ).values('count')
+    Claim.objects.filter(flags__isnull=False).distinct().update(
+        flag_count=Coalesce(Subquery(counts), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0005_claim_status_id_index'),
+    ]
+
+    operations = [
+        # A plain ADD COLUMN with a database default, so COPY loads can omit the column
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'ALTER TABLE claims_claim ADD COLUMN flag_count integer NOT NULL DEFAULT 0 '
+                    'CHECK (flag_count >= 0)',
+                    reverse_sql='ALTER TABLE claims_claim DROP COLUMN flag_count',
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='claim',
+                    name='flag_count',
+                    field=models.PositiveIntegerField(default=0, editable=False),
+                ),
+            ],
+        ),
+        migrations.RunPython(rebuild_flag_counts, migrations.RunPython.noop),
+    ]
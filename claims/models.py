@@ -1,5 +1,17 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+
+# PostgreSQL-only indexes on Claim, created by the PostgresOnly operations in migrations 0003/0004.
+# They stay out of Meta.indexes so SQLite table rebuilds in later migrations never try to recreate them.
+POSTGRES_CLAIM_INDEXES = [
+    # Trigram indexes for icontains search, which compiles to UPPER(column) LIKE on PostgreSQL
+    GinIndex(OpClass(Upper('patient_name'), name='gin_trgm_ops'), name='claim_patient_trgm'),
+    GinIndex(OpClass(Upper('insurer_name'), name='gin_trgm_ops'), name='claim_insurer_trgm'),
+    GinIndex(fields=['search_vector'], name='claim_search_vector_gin'),  # For full-text search
+]
 
 # Core claim data, loaded from CSV/JSON
 class Claim(models.Model):
@@ -16,14 +28,18 @@ class Claim(models.Model):
     insurer_name = models.CharField(max_length=255)
     discharge_date = models.DateField()
     burger_combo_code = models.CharField(max_length=100, blank=True, null=True)
+    # patient_name + insurer_name, kept current by a PostgreSQL trigger (always NULL on SQLite)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Number of Flag rows for this claim, kept current by the signals in claims.signals
+    flag_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=['patient_name']),  # For search functionality
             models.Index(fields=['insurer_name']),  # For search functionality
-            models.Index(fields=['status']),  # For status filtering
+            # Status filter + the list page's -id sort; also covers status-only lookups
+            models.Index(fields=['status', '-id'], name='claim_status_id_idx'),
             models.Index(fields=['discharge_date']),  # For date-based queries
-            models.Index(fields=['-id']),  # For pagination (already primary key, but explicit for ordering)
         ]
 
     def __str__(self):
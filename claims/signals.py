@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Claim, Flag
+from .utils import invalidate_claim_counts, invalidate_claims_list, invalidate_dashboard_stats
+
+
+def invalidate_on_commit(*invalidations):
+    """Run cache invalidations once the write commits, keeping cache I/O (and its failures) out of the transaction"""
+    for invalidate in invalidations:
+        transaction.on_commit(invalidate, robust=True)
+
+
+@receiver(pre_save, sender=Flag)
+def remember_flag_claim(sender, instance, raw=False, **kwargs):
+    """Note which claim an existing flag pointed at so a reassignment can move its count"""
+    if instance.pk and not raw:
+        instance._previous_claim_id = (
+            Flag.objects.filter(pk=instance.pk).values_list('claim_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Flag)
+def increment_flag_count(sender, instance, created, **kwargs):
+    """Count a new flag on its claim, or move the count when a flag changes claim"""
+    previous_claim_id = instance.__dict__.pop('_previous_claim_id', None)
+    if created:
+        Claim.objects.filter(id=instance.claim_id).update(flag_count=F('flag_count') + 1)
+        invalidate_on_commit(invalidate_dashboard_stats, invalidate_claims_list)
+    elif previous_claim_id is not None and previous_claim_id != instance.claim_id:
+        Claim.objects.filter(id=previous_claim_id, flag_count__gt=0).update(flag_count=F('flag_count') - 1)
+        Claim.objects.filter(id=instance.claim_id).update(flag_count=F('flag_count') + 1)
+        invalidate_on_commit(invalidate_dashboard_stats, invalidate_claims_list)
+    else:
+        invalidate_on_commit(invalidate_claims_list)
+
+
+@receiver(post_delete, sender=Flag)
+def decrement_flag_count(sender, instance, **kwargs):
+    """Stop counting a deleted flag; a no-op when the claim itself is being deleted"""
+    Claim.objects.filter(id=instance.claim_id, flag_count__gt=0).update(flag_count=F('flag_count') - 1)
+    invalidate_on_commit(invalidate_dashboard_stats, invalidate_claims_list)
+
+
+@receiver(post_save, sender=Claim)
+@receiver(post_delete, sender=Claim)
+def claim_changed(sender, **kwargs):
+    """Edits outside the importers (e.g. the admin) retire cached counts and list pages too"""
+    invalidate_on_commit(invalidate_claim_counts)
@@ -1,3 +1,501 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .forms import SAMPLE_SIZE, DataUploadForm, read_csv_header, read_first_json_item
+from .management.commands.load_claim_data import copy_lines
+from .models import Claim, ClaimDetail, Flag
+from .utils import (
+    DASHBOARD_STATS_CACHE_KEY, CachedCountPaginator, DataImporter, _csv_rows, get_dashboard_stats, invalidate_claim_counts, invalidate_claims_list,
+)
+from .views import handle_db_errors, prefix_search_query
+
+
+CLAIMS_HEADER = 'id|patient_name|billed_amount|paid_amount|status|insurer_name|discharge_date\n'
+DETAILS_HEADER = 'id|claim_id|denial_reason|cpt_codes\n'
+
+
+def claims_csv(*rows):
+    return CLAIMS_HEADER + ''.join(f'{row}\n' for row in rows)
+
+
+def upload(name, content):
+    return SimpleUploadedFile(name, content.encode('utf-8'), content_type='text/csv')
+
+
+def create_claim(claim_id, **fields):
+    values = {
+        'patient_name': 'Virginia Rhodes',
+        'billed_amount': Decimal('100.00'),
+        'paid_amount': Decimal('50.00'),
+        'status': 'Paid',
+        'insurer_name': 'United Healthcare',
+        'discharge_date': date(2022, 12, 19),
+    }
+    values.update(fields)
+    return Claim.objects.create(id=claim_id, **values)
+
+
+class DataImporterTests(TestCase):
+    def import_csv(self, claims, details=None, operation='add'):
+        details_file = upload('details.csv', details) if details is not None else None
+        return DataImporter().import_data(
+            upload('claims.csv', claims), details_file, file_type='csv', operation=operation
+        )
+
+    def test_add_keeps_existing_claims(self):
+        create_claim(1, patient_name='Old Name')
+        results = self.import_csv(claims_csv(
+            '1|New Name|100.00|50.00|Paid|United Healthcare|2022-12-19',
+            '2|Andrew Hunt|200.00|0.00|Denied|Self Funded Inc.|2022-01-30',
+        ))
+        self.assertEqual((results['claims_created'], results['claims_updated']), (1, 0))
+        self.assertEqual(results['errors'], [])
+        self.assertEqual(Claim.objects.get(id=1).patient_name, 'Old Name')
+        self.assertEqual(Claim.objects.count(), 2)
+
+    def test_overwrite_replaces_existing_data(self):
+        create_claim(1)
+        create_claim(9)
+        results = self.import_csv(
+            claims_csv('2|Andrew Hunt|200.00|0.00|Denied|Self Funded Inc.|2022-01-30'),
+            DETAILS_HEADER + '1|2|Out-of-network provider|90834,90837\n',
+            operation='overwrite',
+        )
+        self.assertEqual((results['claims_created'], results['claims_updated']), (1, 0))
+        self.assertEqual(results['details_created'], 1)
+        self.assertEqual(list(Claim.objects.values_list('id', flat=True)), [2])
+        self.assertEqual(ClaimDetail.objects.get().cpt_codes, '90834,90837')
+
+    def test_invalid_rows_are_reported(self):
+        results = self.import_csv(claims_csv(
+            '1|A|10.00|5.00|Paid|X|2022-01-05',
+            '2|B|10.00|5.00|Lost|X|2022-01-05',
+            '3|C|10.00|5.00|Paid|X|not-a-date',
+        ))
+        self.assertEqual(results['claims_created'], 1)
+        self.assertEqual(len(results['errors']), 2)
+
+    def test_date_formats(self):
+        formats = {
+            1: '2022-01-05',
+            2: '01/25/2022',
+            3: '25/01/2022',
+            4: '2022/01/25',
+            5: '01-25-2022',
+            6: '25-01-2022',
+        }
+        results = self.import_csv(claims_csv(*(
+            f'{claim_id}|A|10.00|5.00|Paid|X|{value}' for claim_id, value in formats.items()
+        )))
+        self.assertEqual(results['errors'], [])
+        dates = dict(Claim.objects.values_list('id', 'discharge_date'))
+        self.assertEqual(dates.pop(1), date(2022, 1, 5))
+        self.assertEqual(set(dates.values()), {date(2022, 1, 25)})
+
+    def test_blank_lines_are_skipped(self):
+        results = self.import_csv(
+            claims_csv('1|A|10.00|5.00|Paid|X|2022-01-05', '', '2|B|10.00|5.00|Paid|X|2022-01-06', '', ''),
+            DETAILS_HEADER + '1|1|Policy terminated|99204\n\n\n',
+        )
+        self.assertEqual(results['errors'], [])
+        self.assertEqual((results['claims_created'], results['details_created']), (2, 1))
+
+    def test_unpadded_iso_dates(self):
+        results = self.import_csv(claims_csv('1|A|10.00|5.00|Paid|X|2022-1-5'))
+        self.assertEqual(results['errors'], [])
+        self.assertEqual(Claim.objects.get().discharge_date, date(2022, 1, 5))
+
+    def test_add_reports_claims_inserted_since_the_lookup(self):
+        create_claim(1)
+        # As if another import inserted claim 1 after the existing-id lookup
+        with mock.patch.object(Claim.objects, 'filter', return_value=Claim.objects.none()):
+            results = self.import_csv(claims_csv(
+                '1|A|10.00|5.00|Paid|X|2022-01-05',
+                '2|B|10.00|5.00|Paid|X|2022-01-06',
+            ))
+        self.assertEqual(results['claims_created'], 1)
+        self.assertEqual(len(results['errors']), 1)
+        self.assertTrue(results['errors'][0].startswith('Claim 1: '))
+        self.assertEqual(Claim.objects.count(), 2)
+
+
+class LoadClaimDataTests(TestCase):
+    def load(self, claims, details, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            claims_file = Path(directory, 'claims.csv')
+            details_file = Path(directory, 'details.csv')
+            claims_file.write_text(claims)
+            details_file.write_text(details)
+            call_command(
+                'load_claim_data', *args,
+                claims_file=str(claims_file), details_file=str(details_file), stdout=StringIO(),
+            )
+
+    def test_overwrite_replaces_claims(self):
+        create_claim(9)
+        self.load(
+            claims_csv('1|A|10.00|5.00|Paid|X|2022-01-05', '2|B|10.00|5.00|Denied|X|2022-01-06'),
+            DETAILS_HEADER + '1|1|Policy terminated|99204\n',
+            '--overwrite',
+        )
+        self.assertEqual(list(Claim.objects.order_by('id').values_list('id', flat=True)), [1, 2])
+        self.assertEqual(ClaimDetail.objects.get().claim_id, 1)
+
+    def test_append_keeps_existing_claims(self):
+        create_claim(1, patient_name='Old Name')
+        self.load(
+            claims_csv('1|New Name|10.00|5.00|Paid|X|2022-01-05', '2|B|10.00|5.00|Denied|X|2022-01-06'),
+            DETAILS_HEADER,
+            '--append',
+        )
+        self.assertEqual(Claim.objects.get(id=1).patient_name, 'Old Name')
+        self.assertEqual(Claim.objects.count(), 2)
+
+    def test_blank_lines_are_skipped(self):
+        self.load(
+            claims_csv('1|A|10.00|5.00|Paid|X|2022-01-05', '2|B|10.00|5.00|Denied|X|2022-01-06', '', ''),
+            DETAILS_HEADER + '1|1|Policy terminated|99204\n\n\n',
+            '--overwrite',
+        )
+        self.assertEqual(Claim.objects.count(), 2)
+        self.assertEqual(ClaimDetail.objects.get().claim_id, 1)
+
+    def test_unpadded_iso_dates(self):
+        self.load(claims_csv('1|A|10.00|5.00|Paid|X|2022-1-5'), DETAILS_HEADER, '--overwrite')
+        self.assertEqual(Claim.objects.get().discharge_date, date(2022, 1, 5))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        create_claim(1, burger_combo_code='B1')
+        create_claim(2, patient_name='Andrew Hunt', billed_amount=Decimal('200.50'), status='Denied')
+        ClaimDetail.objects.create(claim_id=1, cpt_codes='99204,82947')
+
+    def export(self, **params):
+        response = self.client.get(reverse('data_admin_export'), params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_json_export(self):
+        data = json.loads(self.export(format='json'))
+        self.assertEqual((data['total_claims'], data['total_details']), (2, 1))
+        claims = {claim['id']: claim for claim in data['claims']}
+        self.assertEqual(Decimal(str(claims[2]['billed_amount'])), Decimal('200.50'))
+        self.assertEqual(claims[1]['discharge_date'], '2022-12-19')
+        self.assertEqual(claims[1]['burger_combo_code'], 'B1')
+        self.assertEqual(data['claim_details'][0]['claim_id'], 1)
+        self.assertEqual(data['claim_details'][0]['cpt_codes'], '99204,82947')
+
+    def test_csv_exports(self):
+        lines = self.export(format='csv').splitlines()
+        self.assertEqual(
+            lines[0], 'id|patient_name|billed_amount|paid_amount|status|insurer_name|discharge_date|burger_combo_code'
+        )
+        self.assertEqual(sorted(lines[1:]), [
+            '1|Virginia Rhodes|100.00|50.00|Paid|United Healthcare|2022-12-19|B1',
+            '2|Andrew Hunt|200.50|50.00|Denied|United Healthcare|2022-12-19|',
+        ])
+        details = self.export(format='csv', type='details').splitlines()
+        self.assertEqual(details, ['claim_id|cpt_codes|denial_reason', '1|99204,82947|'])
+
+
+class UploadValidationTests(TestCase):
+    def test_csv_header(self):
+        file = upload('claims.csv', claims_csv('1|A|10.00|5.00|Paid|X|2022-01-05'))
+        self.assertEqual(read_csv_header(file), CLAIMS_HEADER.strip().split('|'))
+        self.assertEqual(file.tell(), 0)
+
+    def test_first_json_item(self):
+        file = SimpleUploadedFile('claims.json', b'[{"id": 1}, {"id": 2}]')
+        self.assertEqual(read_first_json_item(file), {'id': 1})
+        self.assertEqual(file.tell(), 0)
+        self.assertIsNone(read_first_json_item(SimpleUploadedFile('claims.json', b'{"id": 1}')))
+
+    def test_form_reports_missing_columns(self):
+        form = DataUploadForm(
+            {'operation': 'add', 'file_type': 'csv'},
+            {'claims_file': upload('claims.csv', 'id|patient_name\n1|A\n')},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('Missing required columns', str(form.errors['claims_file']))
+
+    def test_header_must_fit_in_the_sample(self):
+        with self.assertRaises(ValidationError):
+            read_csv_header(upload('claims.csv', 'x' * (SAMPLE_SIZE + 10)))
+
+    def test_binary_upload_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            read_csv_header(SimpleUploadedFile('claims.csv', b'id|\0\n'))
+
+
+class CsvRowsTests(SimpleTestCase):
+    def test_plain_join_matches_csv_writer(self):
+        fieldnames = ['id', 'patient_name', 'billed_amount', 'burger_combo_code', 'discharge_date']
+        rows = [
+            (1, 'Virginia Rhodes', Decimal('10.50'), None, date(2022, 1, 5)),
+            (2, 'Pipe | Name', Decimal('1.00'), 'a "quoted" word', date(2022, 1, 6)),
+            (3, 'Line\nbreak', Decimal('2.00'), '', date(2022, 1, 7)),
+            (4, 'Carriage\rreturn', Decimal('3.00'), 'B1', date(2022, 1, 8)),
+        ]
+        expected = StringIO()
+        csv.writer(expected, delimiter='|').writerows([fieldnames, *rows])
+        self.assertEqual(''.join(_csv_rows(rows, fieldnames)), expected.getvalue())
+
+
+class CachedCountPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_claim(1)
+        create_claim(2)
+
+    def test_count_is_cached_until_invalidated(self):
+        paid = Claim.objects.filter(status='Paid').order_by('-id')
+        self.assertEqual(CachedCountPaginator(paid, 10, filters=('', 'Paid')).count, 2)
+        # update() sends no signals, so only the version bump retires the cached count
+        Claim.objects.filter(id=2).update(status='Denied')
+        self.assertEqual(CachedCountPaginator(paid, 10, filters=('', 'Paid')).count, 2)
+        self.assertEqual(CachedCountPaginator(paid, 10, filters=('', 'Denied')).count, 1)
+        invalidate_claim_counts()
+        self.assertEqual(CachedCountPaginator(paid, 10, filters=('', 'Paid')).count, 1)
+
+    def test_page_rows(self):
+        for claim_id in range(3, 26):
+            create_claim(claim_id)
+        paginator = CachedCountPaginator(Claim.objects.order_by('-id'), 10)
+        self.assertEqual([claim.id for claim in paginator.page(2)], list(range(15, 5, -1)))
+        self.assertEqual([claim.id for claim in paginator.page(3)], [5, 4, 3, 2, 1])
+
+
+@override_settings(CLAIMS_KEYSET_PAGINATION=True)
+class ClaimsListPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('reviewer'))
+        for claim_id in range(1, 26):
+            create_claim(claim_id)
+
+    def get(self, **params):
+        return self.client.get(reverse('claims:claims_list'), params)
+
+    def page_ids(self, response):
+        return [claim.id for claim in response.context['claims']]
+
+    def test_after_id_pages(self):
+        response = self.get(page_size=10)
+        self.assertEqual(self.page_ids(response), list(range(25, 15, -1)))
+        self.assertEqual(response.context['keyset']['next_after_id'], 16)
+        self.assertEqual(response.context['keyset']['count'], 25)
+
+        response = self.get(page_size=10, after_id=16)
+        self.assertEqual(self.page_ids(response), list(range(15, 5, -1)))
+        response = self.get(page_size=10, after_id=6)
+        self.assertEqual(self.page_ids(response), [5, 4, 3, 2, 1])
+        self.assertIsNone(response.context['keyset']['next_after_id'])
+
+    def test_page_parameter_uses_numbered_pages(self):
+        response = self.get(page_size=10, page=2)
+        self.assertIsNone(response.context['keyset'])
+        self.assertEqual(self.page_ids(response), list(range(15, 5, -1)))
+
+    @override_settings(CLAIMS_KEYSET_PAGINATION=False)
+    def test_numbered_pagination_setting(self):
+        response = self.get(page_size=10)
+        self.assertIsNone(response.context['keyset'])
+        self.assertEqual(response.context['claims'].paginator.num_pages, 3)
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_totals(self):
+        claim = create_claim(1)
+        create_claim(2, billed_amount=Decimal('200.00'), paid_amount=Decimal('0.00'), status='Denied')
+        Flag.objects.create(claim=claim, user=User.objects.create_user('reviewer'))
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['total_claims'], 2)
+        self.assertEqual(stats['total_billed'], Decimal('300.00'))
+        self.assertEqual(stats['total_paid'], Decimal('50.00'))
+        self.assertEqual(stats['outstanding_amount'], Decimal('250.00'))
+        self.assertEqual(stats['avg_underpayment'], Decimal('125.00'))
+        self.assertEqual(stats['total_flagged'], 1)
+
+    def test_empty_table(self):
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['total_claims'], 0)
+        self.assertEqual(stats['total_billed'], Decimal('0.00'))
+        self.assertEqual(stats['status_breakdown'], [])
+
+    def test_amounts_are_exact_cents(self):
+        create_claim(1, billed_amount=Decimal('0.10'), paid_amount=Decimal('0.00'))
+        create_claim(2, billed_amount=Decimal('0.20'), paid_amount=Decimal('0.00'), status='Denied')
+        stats = get_dashboard_stats()
+        self.assertEqual(str(stats['total_billed']), '0.30')
+        self.assertEqual(str(stats['avg_underpayment']), '0.15')
+        self.assertEqual(stats['status_breakdown'], [
+            {'status': 'Denied', 'count': 1},
+            {'status': 'Paid', 'count': 1},
+        ])
+
+
+class FlagCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer')
+        self.client.force_login(self.user)
+        self.claim = create_claim(1)
+
+    def flag(self, claim_id):
+        return self.client.post(reverse('claims:flag_claim', args=[claim_id]), HTTP_HX_REQUEST='true')
+
+    def test_flag_claim_counts_each_user_once(self):
+        self.assertEqual(self.flag(1).status_code, 200)
+        self.assertEqual(self.flag(1).status_code, 200)
+        self.claim.refresh_from_db()
+        self.assertEqual(self.claim.flag_count, 1)
+
+        Flag.objects.create(claim=self.claim, user=User.objects.create_user('other'))
+        self.claim.refresh_from_db()
+        self.assertEqual(self.claim.flag_count, 2)
+
+    def test_deleting_a_flag(self):
+        self.flag(1)
+        Flag.objects.get().delete()
+        self.claim.refresh_from_db()
+        self.assertEqual(self.claim.flag_count, 0)
+
+    def test_moving_a_flag_to_another_claim(self):
+        second = create_claim(2)
+        self.flag(1)
+        flag = Flag.objects.get()
+        flag.claim = second
+        flag.save()
+        self.claim.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((self.claim.flag_count, second.flag_count), (0, 1))
+
+    def test_cache_invalidation_waits_for_the_commit(self):
+        cache.set(DASHBOARD_STATS_CACHE_KEY, 'stale')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.flag(1)
+            self.assertEqual(cache.get(DASHBOARD_STATS_CACHE_KEY), 'stale')
+        self.assertTrue(callbacks)
+        self.assertIsNone(cache.get(DASHBOARD_STATS_CACHE_KEY))
+
+
+@override_settings(CLAIMS_LIST_CACHE_PARTIALS=True)
+class ClaimsListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('reviewer'))
+        create_claim(1)
+
+    def get_partial(self):
+        return self.client.get(reverse('claims:claims_list'), HTTP_HX_REQUEST='true').content.decode()
+
+    def test_partial_is_cached_until_the_version_is_bumped(self):
+        self.assertIn('Virginia Rhodes', self.get_partial())
+        # update() sends no signals, so the cached partial is still served
+        Claim.objects.filter(id=1).update(patient_name='Andrew Hunt')
+        self.assertIn('Virginia Rhodes', self.get_partial())
+        invalidate_claims_list()
+        self.assertIn('Andrew Hunt', self.get_partial())
+
+    @override_settings(CLAIMS_LIST_CACHE_PARTIALS=False)
+    def test_partials_are_not_cached_without_a_shared_cache(self):
+        self.assertIn('Virginia Rhodes', self.get_partial())
+        Claim.objects.filter(id=1).update(patient_name='Andrew Hunt')
+        self.assertIn('Andrew Hunt', self.get_partial())
+
+
+class FlagMissingClaimTests(TransactionTestCase):
+    # SQLite checks the deferred claim FK on commit, which TestCase never reaches
+    def test_flag_missing_claim_returns_404(self):
+        self.client.force_login(User.objects.create_user('reviewer'))
+        response = self.client.post(reverse('claims:flag_claim', args=[404]), HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Flag.objects.exists())
+
+
+class HandleDbErrorsTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('reviewer'))
+
+    def test_database_error_becomes_json_500(self):
+        @handle_db_errors
+        def view(request):
+            raise OperationalError('database is locked')
+
+        response = view(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('database issues', json.loads(response.content)['error'])
+
+    def test_claims_list_page_shows_an_empty_list(self):
+        with mock.patch('claims.views.CachedCountPaginator', side_effect=OperationalError('database is locked')):
+            response = self.client.get(reverse('claims:claims_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['claims'], [])
+        self.assertIn('database issues', [str(message) for message in response.context['messages']][0])
+
+    def test_claims_list_partial_gets_json(self):
+        with mock.patch('claims.views.CachedCountPaginator', side_effect=OperationalError('database is locked')):
+            response = self.client.get(reverse('claims:claims_list'), HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('database issues', json.loads(response.content)['error'])
+
+    def test_unexpected_error_becomes_json_500(self):
+        create_claim(1)
+        with mock.patch.object(Flag.objects, 'create', side_effect=RuntimeError('boom')):
+            response = self.client.post(reverse('claims:flag_claim', args=[1]), HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(json.loads(response.content)['error'], 'Something went wrong. Please try again.')
+
+    def test_missing_claim_is_still_a_404(self):
+        response = self.client.get(reverse('claims:claim_detail', args=[404]), HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 404)
+
+
+class PrefixSearchQueryTests(SimpleTestCase):
+    def test_last_word_is_a_prefix(self):
+        self.assertEqual(prefix_search_query('Virg'), 'Virg:*')
+        self.assertEqual(prefix_search_query("O'Brien  United"), 'O & Brien & United:*')
+
+    def test_operators_are_dropped(self):
+        self.assertEqual(prefix_search_query('a & (b | !c)'), 'a & b & c:*')
+        self.assertIsNone(prefix_search_query('&|!'))
+
+
+class CopyLinesTests(SimpleTestCase):
+    def test_blank_lines_are_dropped(self):
+        lines = ['id|name\n', '1|A\n', '\n', '2|"B\n', '\n', 'C"\n', '\r\n']
+        self.assertEqual(list(copy_lines(lines)), ['id|name\n', '1|A\n', '2|"B\n', '\n', 'C"\n'])
+
+    def test_extra_field_is_added_to_every_record(self):
+        lines = ['id|name\r\n', '1|"A\n', 'B"\n', '\n']
+        self.assertEqual(list(copy_lines(lines, extra_field=True)), ['id|name|\n', '1|"A\n', 'B"|\n'])
+
+
+class ClaimAdminTests(TestCase):
+    def test_changelist_sorts_by_flag_count(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+        flagged = create_claim(1)
+        create_claim(2)
+        Flag.objects.create(claim=flagged, user=User.objects.get())
+        # flag_count is the eighth list_display column
+        response = self.client.get(reverse('admin:claims_claim_changelist'), {'o': '-8'})
+        self.assertEqual([claim.id for claim in response.context['cl'].result_list], [1, 2])
@@ -1,21 +1,239 @@
 import csv
-import json
+import hashlib
 import io
 import logging
+import django
+import ijson
+import orjson
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
-from django.db import transaction
+from functools import lru_cache
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.management.color import no_style
 from django.core.exceptions import ValidationError
-from .models import Claim, ClaimDetail
+from django.utils.functional import cached_property
+from .models import Claim, ClaimDetail, Flag, Note
+from ._fastparse import parse_iso_date
 
 logger = logging.getLogger('claims')
 
+# Tables at least this large report the planner's estimate instead of COUNT(*)
+COUNT_ESTIMATE_THRESHOLD = 100000
+DATA_COUNTS_CACHE_KEY = 'claims_counts'
+DATA_COUNTS_TIMEOUT = 60
+DASHBOARD_STATS_CACHE_KEY = 'claims_dashboard_stats'
+DASHBOARD_STATS_TIMEOUT = 120
+# Bumped whenever claims are added or removed, retiring every cached list count at once
+CLAIM_COUNT_VERSION_KEY = 'claims:count:version'
+CLAIM_COUNT_TIMEOUT = 60
+# Bumped whenever claims or flags change, retiring every cached claims list partial at once
+CLAIMS_LIST_VERSION_KEY = 'claims:list:version'
+CLAIMS_LIST_TIMEOUT = 30
+
+
+def estimate_row_count(model, using='default'):
+    """Return PostgreSQL's pg_class row estimate for a model's table, or None on other backends"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def fast_count(model):
+    """Count a table exactly, unless it is large enough that an estimate will do"""
+    estimate = estimate_row_count(model)
+    if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+        return estimate
+    return model.objects.count()
+
+
+def truncate_claims_data(using='default'):
+    """Empty the claims tables in one statement per table, without per-row cascades or signals"""
+    connection = connections[using]
+    # Flags and notes would be cascaded away by deleting their claims as well
+    tables = [model._meta.db_table for model in (Flag, Note, ClaimDetail, Claim)]
+    # TRUNCATE ... RESTART IDENTITY CASCADE on PostgreSQL, plain DELETEs on SQLite
+    statements = connection.ops.sql_flush(no_style(), tables, reset_sequences=True, allow_cascade=True)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def _compute_data_counts():
+    return {
+        'claims_count': fast_count(Claim),
+        'details_count': fast_count(ClaimDetail),
+        'flags_count': fast_count(Flag),
+        'notes_count': fast_count(Note),
+    }
+
+
+def get_data_counts():
+    """Row counts for the data management pages, cached briefly"""
+    return cache.get_or_set(DATA_COUNTS_CACHE_KEY, _compute_data_counts, DATA_COUNTS_TIMEOUT)
+
+
+# All claim totals, including flagged claims via the denormalized flag_count, in one scan
+DASHBOARD_TOTALS_SQL = """
+    SELECT COUNT(*) AS total_claims,
+           COALESCE(SUM(billed_amount), 0) AS total_billed,
+           COALESCE(SUM(paid_amount), 0) AS total_paid,
+           COALESCE(AVG(billed_amount - paid_amount), 0) AS avg_underpayment,
+           COALESCE(SUM(CASE WHEN flag_count > 0 THEN 1 ELSE 0 END), 0) AS total_flagged
+    FROM {table}
+"""
+DASHBOARD_STATUS_SQL = "SELECT status, COUNT(*) FROM {table} GROUP BY status ORDER BY status"
+CENTS = Decimal('0.01')
+
+
+def _compute_dashboard_stats(using='default'):
+    connection = connections[using]
+    table = connection.ops.quote_name(Claim._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(DASHBOARD_TOTALS_SQL.format(table=table))
+        columns = [column[0] for column in cursor.description]
+        stats = dict(zip(columns, cursor.fetchone()))
+        cursor.execute(DASHBOARD_STATUS_SQL.format(table=table))
+        status_breakdown = [{'status': status, 'count': count} for status, count in cursor.fetchall()]
+    # SQLite sums numeric columns as floats; PostgreSQL already returns Decimal
+    for key in ('total_billed', 'total_paid', 'avg_underpayment'):
+        stats[key] = Decimal(str(stats[key])).quantize(CENTS)
+    stats['outstanding_amount'] = stats['total_billed'] - stats['total_paid']
+    stats['status_breakdown'] = status_breakdown
+    return stats
+
+
+def get_dashboard_stats():
+    """Claim totals and status breakdown for the admin dashboard, cached until claims or flags change"""
+    return cache.get_or_set(DASHBOARD_STATS_CACHE_KEY, _compute_dashboard_stats, DASHBOARD_STATS_TIMEOUT)
+
+
+def invalidate_dashboard_stats():
+    """Drop the cached dashboard totals after claims or flags change"""
+    cache.delete(DASHBOARD_STATS_CACHE_KEY)
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No version stored yet (or it was evicted)
+        cache.set(key, 2, None)
+
+
+def invalidate_claims_list():
+    """Retire the cached claims list partials after claims or flags change"""
+    _bump_version(CLAIMS_LIST_VERSION_KEY)
+
+
+def invalidate_claim_counts():
+    """Drop cached counts after an import or bulk load changes the claims tables"""
+    cache.delete_many([DATA_COUNTS_CACHE_KEY, DASHBOARD_STATS_CACHE_KEY])
+    _bump_version(CLAIM_COUNT_VERSION_KEY)
+    invalidate_claims_list()
+
+
+def claims_list_cache_key(params):
+    """Cache key for one rendering of the claims list partial"""
+    version = cache.get_or_set(CLAIMS_LIST_VERSION_KEY, 1, None)
+    # Stable across processes, unlike hash()
+    digest = hashlib.md5(repr(tuple(params)).encode()).hexdigest()
+    return f'claims:list:{version}:{digest}'
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that caches COUNT(*) per filter combination for CLAIM_COUNT_TIMEOUT seconds
+    and slices pages on primary keys only
+    """
+    
+    def __init__(self, object_list, per_page, filters=(), **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        # Stable across processes, unlike hash()
+        self.filters_key = hashlib.md5(repr(tuple(filters)).encode()).hexdigest()
+    
+    @cached_property
+    def count(self):
+        version = cache.get_or_set(CLAIM_COUNT_VERSION_KEY, 1, None)
+        key = f'claims:count:{version}:{self.filters_key}'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, CLAIM_COUNT_TIMEOUT)
+        return count
+    
+    def page(self, number):
+        """
+        Return a Page whose rows are fetched by pk.
+        OFFSET runs over a narrow id-only subquery; the outer query keeps the
+        select_related/prefetch_related of object_list and loads at most per_page wide rows.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        page_ids = self.object_list.values('pk')[bottom:top]
+        return self._get_page(self.object_list.filter(pk__in=page_ids), number, self)
+
+
+@lru_cache(maxsize=4096)
+def _cached_parse_date(date_str, formats):
+    """Parse a date string, trying ISO first and then each of formats; imports repeat the same few dates"""
+    try:
+        return parse_iso_date(date_str)
+    except ValueError:
+        for date_format in formats:
+            try:
+                return datetime.strptime(date_str, date_format).date()
+            except ValueError:
+                continue
+        raise
+
 
 class DataImporter:
     # File size limit: 50MB
     MAX_FILE_SIZE = 50 * 1024 * 1024
     # Maximum rows to process
     MAX_ROWS = 50000
+    # Processes used to validate CSV claim rows (IMPORT_WORKERS setting); 1 validates inline
+    VALIDATION_WORKERS = settings.IMPORT_WORKERS
+    # CSV rows handed to a validation worker at a time
+    VALIDATION_CHUNK_SIZE = 5000
+    # JSON uploads above this size are streamed with ijson rather than parsed at once
+    JSON_STREAM_THRESHOLD = 5 * 1024 * 1024
+    # Row-level errors kept in the results
+    MAX_ERRORS = 1000
+    # Row-level errors included in the log summary
+    LOGGED_ERRORS = 50
+    # Rows written per bulk query (IMPORT_BATCH_SIZE setting / environment variable)
+    BATCH_SIZE = settings.IMPORT_BATCH_SIZE
+    CLAIM_UPDATE_FIELDS = [
+        'patient_name', 'billed_amount', 'paid_amount', 'status',
+        'insurer_name', 'discharge_date', 'burger_combo_code',
+    ]
+    DETAIL_UPDATE_FIELDS = ['cpt_codes', 'denial_reason']
+    # Accepted statuses; the list keeps choice order for error messages
+    STATUS_NAMES = [value for value, label in Claim.status_choices]
+    VALID_STATUSES = frozenset(STATUS_NAMES)
+    # Formats tried after the ISO fast path, in order; '%Y-%m-%d' catches unpadded ISO dates (2022-1-5)
+    DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%m-%d-%Y', '%d-%m-%Y')
+    # Upper bound for amounts (max_digits=10, decimal_places=2)
+    MAX_AMOUNT = Decimal('9999999.99')
+    ZERO = Decimal('0.00')
+    # Strips currency symbols and thousands separators in one pass
+    _DECIMAL_TRANS = str.maketrans('', '', '$,')
     
     def __init__(self):
         self.results = {
@@ -23,7 +241,9 @@ class DataImporter:
             'claims_updated': 0,
             'details_created': 0,
             'details_updated': 0,
-            'errors': []
+            'errors': [],
+            # Row errors dropped once MAX_ERRORS have been recorded
+            'errors_truncated': 0,
         }
     
     def validate_file(self, file):
@@ -41,17 +261,30 @@ class DataImporter:
     def safe_decimal_conversion(self, value, field_name):
         """Safely convert string to decimal with proper error handling"""
         try:
-            # Remove any currency symbols and whitespace
-            cleaned_value = str(value).replace('$', '').replace(',', '').strip()
-            if not cleaned_value:
-                return Decimal('0.00')
-            
-            decimal_value = Decimal(cleaned_value)
+            if isinstance(value, Decimal):
+                # JSON numbers arrive as Decimal from ijson
+                decimal_value = value
+            elif isinstance(value, int) and not isinstance(value, bool):
+                decimal_value = Decimal(value)
+            elif isinstance(value, float):
+                # Via str() so 0.1 stays 0.1 rather than its binary expansion
+                decimal_value = Decimal(str(value))
+            else:
+                text = value if isinstance(value, str) else str(value)
+                if text and text[-1].isdigit() and '$' not in text and ',' not in text:
+                    # Already clean, as machine-generated amounts almost always are
+                    decimal_value = Decimal(text)
+                else:
+                    # Remove any currency symbols and whitespace
+                    cleaned_value = text.translate(self._DECIMAL_TRANS).strip()
+                    if not cleaned_value:
+                        return self.ZERO
+                    decimal_value = Decimal(cleaned_value)
             
             # Check for reasonable bounds (adjust as needed for your use case)
-            if decimal_value < 0:
-                raise ValueError(f"Negative value not allowed for {field_name}")
-            if decimal_value > Decimal('9999999.99'):
+            if not (self.ZERO <= decimal_value <= self.MAX_AMOUNT):
+                if decimal_value < 0:
+                    raise ValueError(f"Negative value not allowed for {field_name}")
                 raise ValueError(f"Value too large for {field_name}")
                 
             return decimal_value
@@ -77,24 +310,18 @@ class DataImporter:
             
             logger.info(f"Starting data import: file_type={file_type}, operation={operation}")
             
-            with transaction.atomic():
-                if operation == 'overwrite':
+            if operation == 'overwrite':
+                # Replacing the data is all-or-nothing
+                with transaction.atomic():
                     logger.warning("Deleting all existing data as requested")
                     # Delete all existing data
-                    ClaimDetail.objects.all().delete()
-                    Claim.objects.all().delete()
-                
-                # Import claims
-                if file_type == 'csv':
-                    self._import_claims_csv(claims_file, operation == 'add')
-                    if details_file:
-                        self._import_details_csv(details_file, operation == 'add')
-                else:  # JSON
-                    self._import_claims_json(claims_file, operation == 'add')
-                    if details_file:
-                        self._import_details_json(details_file, operation == 'add')
+                    truncate_claims_data()
+                    self._import_files(claims_file, details_file, file_type, append=False)
+            else:
+                # Each flushed batch commits on its own
+                self._import_files(claims_file, details_file, file_type, append=True)
                         
-            logger.info(f"Import completed: {self.results}")
+            logger.info(f"Import completed: {self._summary()}")
                         
         except ValidationError as e:
             error_msg = f'Validation failed: {str(e)}'
@@ -106,305 +333,493 @@ class DataImporter:
             self.results['errors'].append(error_msg)
             logger.error(error_msg, exc_info=True)
             raise
+        finally:
+            self._log_row_errors()
+            # Batches committed before a failure still change the counts
+            invalidate_claim_counts()
         
         return self.results
     
+    def _record_error(self, message):
+        """Keep a row-level error for the results, up to MAX_ERRORS"""
+        if len(self.results['errors']) < self.MAX_ERRORS:
+            self.results['errors'].append(message)
+        else:
+            self.results['errors_truncated'] += 1
+    
+    def _summary(self):
+        """Results for logging, with the error list reduced to a count"""
+        summary = {key: value for key, value in self.results.items() if key != 'errors'}
+        summary['errors'] = len(self.results['errors'])
+        return summary
+    
+    def _log_row_errors(self):
+        """Log row-level errors once per import instead of once per row"""
+        errors = self.results['errors']
+        if errors:
+            logger.error(
+                'Import errors: %d total; first %d: %s',
+                len(errors) + self.results['errors_truncated'],
+                min(len(errors), self.LOGGED_ERRORS),
+                errors[:self.LOGGED_ERRORS],
+            )
+    
+    def _import_files(self, claims_file, details_file, file_type, append):
+        """Import the claims file, then the optional details file"""
+        if file_type == 'csv':
+            self._import_claims_csv(claims_file, append)
+            if details_file:
+                self._import_details_csv(details_file, append)
+        else:  # JSON
+            self._import_claims_json(claims_file, append)
+            if details_file:
+                self._import_details_json(details_file, append)
+    
     def _import_claims_csv(self, file, append=True):
         """Import claims from CSV file"""
-        file.seek(0)
-        content = file.read().decode('utf-8')
-        reader = csv.DictReader(io.StringIO(content), delimiter='|')
+        reader = self._read_csv(file)
+        columns = self._column_index(next(reader, []))
+        # Resolve column positions once; rows are then plain list indexing
+        id_col, billed_col, paid_col, status_col, date_col = self._required_columns(
+            columns, 'id', 'billed_amount', 'paid_amount', 'status', 'discharge_date'
+        )
+        positions = (
+            id_col, columns.get('patient_name'), billed_col, paid_col, status_col,
+            columns.get('insurer_name'), date_col, columns.get('burger_combo_code'),
+        )
         
-        row_count = 0
-        for row_num, row in enumerate(reader, start=2):
+        pending = {}
+        for claims, errors in self._validated_chunks(self._numbered_chunks(reader), positions):
+            for error in errors:
+                self._record_error(error)
+            for claim in claims:
+                self._queue(pending, claim.id, claim, append)
+                if len(pending) >= self.BATCH_SIZE:
+                    self._flush_claims(pending, append)
+        
+        self._flush_claims(pending, append)
+    
+    def _numbered_chunks(self, reader):
+        """Group CSV rows into chunks of (row number, row) pairs, stopping at MAX_ROWS"""
+        chunk = []
+        for row_count, (row_num, row) in enumerate(enumerate(reader, start=2), start=1):
             # Protect against too many rows
-            row_count += 1
             if row_count > self.MAX_ROWS:
                 error_msg = f"File exceeds maximum allowed rows ({self.MAX_ROWS})"
                 self.results['errors'].append(error_msg)
                 logger.warning(error_msg)
                 break
-                
+            chunk.append((row_num, row))
+            if len(chunk) >= self.VALIDATION_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    def _validated_chunks(self, chunks, positions):
+        """Yield (claims, errors) per chunk in file order, validating in worker processes if configured"""
+        if self.VALIDATION_WORKERS <= 1:
+            for chunk in chunks:
+                yield self._validate_claim_rows(chunk, positions)
+            return
+        
+        # Workers only parse and validate; every write stays on this process's connection
+        with ProcessPoolExecutor(max_workers=self.VALIDATION_WORKERS, initializer=django.setup) as executor:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(executor.submit(_validate_claim_chunk, type(self), chunk, positions))
+                # Bound the chunks held in memory while the writer catches up
+                if len(in_flight) >= 2 * self.VALIDATION_WORKERS:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+    
+    def _validate_claim_rows(self, numbered_rows, positions):
+        """Build Claims from CSV rows, collecting the errors of rows that fail validation"""
+        id_col, patient_col, billed_col, paid_col, status_col, insurer_col, date_col, burger_col = positions
+        claims = []
+        errors = []
+        for row_num, row in numbered_rows:
             try:
-                claim_id = int(row['id'])
-                
-                # Validate claim ID is positive
-                if claim_id <= 0:
-                    raise ValueError(f"Invalid claim ID: {claim_id}")
-                
-                # Parse date with better error handling
-                discharge_date = self._parse_date(row['discharge_date'], f"Row {row_num}")
-                
-                # Use safe decimal conversion
-                billed_amount = self.safe_decimal_conversion(row['billed_amount'], 'billed_amount')
-                paid_amount = self.safe_decimal_conversion(row['paid_amount'], 'paid_amount')
-                
-                # Validate status
-                valid_statuses = ['Paid', 'Denied', 'Under Review']
-                if row['status'] not in valid_statuses:
-                    raise ValueError(f"Invalid status: {row['status']}. Must be one of: {valid_statuses}")
-                
-                # Validate required fields are not empty
-                if not row.get('patient_name', '').strip():
-                    raise ValueError("Patient name is required")
-                if not row.get('insurer_name', '').strip():
-                    raise ValueError("Insurer name is required")
-                
-                # Create or update claim
-                claim, created = Claim.objects.get_or_create(
-                    id=claim_id,
-                    defaults={
-                        'patient_name': row['patient_name'].strip()[:255],  # Truncate to field limit
-                        'billed_amount': billed_amount,
-                        'paid_amount': paid_amount,
-                        'status': row['status'],
-                        'insurer_name': row['insurer_name'].strip()[:255],  # Truncate to field limit
-                        'discharge_date': discharge_date,
-                        'burger_combo_code': row.get('burger_combo_code', '')[:100],  # Truncate to field limit
-                    }
-                )
-                
-                if created:
-                    self.results['claims_created'] += 1
-                elif not append:
-                    # Update existing claim
-                    claim.patient_name = row['patient_name'].strip()[:255]
-                    claim.billed_amount = billed_amount
-                    claim.paid_amount = paid_amount
-                    claim.status = row['status']
-                    claim.insurer_name = row['insurer_name'].strip()[:255]
-                    claim.discharge_date = discharge_date
-                    claim.burger_combo_code = row.get('burger_combo_code', '')[:100]
-                    claim.save()
-                    self.results['claims_updated'] += 1
-                    
+                claims.append(self._build_claim(
+                    claim_id=row[id_col],
+                    patient_name=self._cell(row, patient_col),
+                    billed_amount=row[billed_col],
+                    paid_amount=row[paid_col],
+                    status=row[status_col],
+                    insurer_name=self._cell(row, insurer_col),
+                    discharge_date=row[date_col],
+                    burger_combo_code=self._cell(row, burger_col),
+                    context=f"Row {row_num}",
+                ))
             except Exception as e:
-                error_msg = f'Row {row_num}: {str(e)}'
-                self.results['errors'].append(error_msg)
-                logger.error(error_msg)
+                errors.append(f'Row {row_num}: {str(e)}')
+        return claims, errors
+    
+    def _build_claim(self, claim_id, patient_name, billed_amount, paid_amount, status,
+                     insurer_name, discharge_date, burger_combo_code, context):
+        """Validate and normalize one record's raw values into an unsaved Claim"""
+        claim_id = int(claim_id)
+        
+        # Validate claim ID is positive
+        if claim_id <= 0:
+            raise ValueError(f"Invalid claim ID: {claim_id}")
+        
+        # Parse date with better error handling
+        discharge_date = self._parse_date(discharge_date, context)
+        
+        # Use safe decimal conversion
+        billed_amount = self.safe_decimal_conversion(billed_amount, 'billed_amount')
+        paid_amount = self.safe_decimal_conversion(paid_amount, 'paid_amount')
+        
+        # Validate status
+        if status not in self.VALID_STATUSES:
+            raise ValueError(f"Invalid status: {status}. Must be one of: {self.STATUS_NAMES}")
+        
+        # Validate required fields are not empty
+        patient_name = (patient_name or '').strip()
+        insurer_name = (insurer_name or '').strip()
+        if not patient_name:
+            raise ValueError("Patient name is required")
+        if not insurer_name:
+            raise ValueError("Insurer name is required")
+        
+        # Truncate to field limits
+        return Claim(
+            id=claim_id,
+            patient_name=patient_name[:255],
+            billed_amount=billed_amount,
+            paid_amount=paid_amount,
+            status=status,
+            insurer_name=insurer_name[:255],
+            discharge_date=discharge_date,
+            burger_combo_code=(burger_combo_code or '')[:100],
+        )
     
     def _parse_date(self, date_str, context=""):
         """Parse date string with multiple format support"""
         try:
-            return datetime.strptime(date_str, '%Y-%m-%d').date()
+            return _cached_parse_date(date_str, self.DATE_FORMATS)
         except ValueError:
-            # Try other common date formats
-            for date_format in ['%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%m-%d-%Y', '%d-%m-%Y']:
-                try:
-                    return datetime.strptime(date_str, date_format).date()
-                except ValueError:
-                    continue
             raise ValueError(f"{context} Invalid date format: {date_str}. Expected YYYY-MM-DD or MM/DD/YYYY or DD/MM/YYYY")
     
     def _import_claims_json(self, file, append=True):
         """Import claims from JSON file"""
-        file.seek(0)
-        content = file.read().decode('utf-8')
-        data = json.loads(content)
-        
-        if len(data) > self.MAX_ROWS:
-            error_msg = f"JSON file exceeds maximum allowed rows ({self.MAX_ROWS})"
-            self.results['errors'].append(error_msg)
-            logger.warning(error_msg)
-            data = data[:self.MAX_ROWS]
-        
-        for i, item in enumerate(data):
+        pending = {}
+        for i, item in enumerate(self._read_json(file)):
+            # Protect against too many rows
+            if i >= self.MAX_ROWS:
+                error_msg = f"JSON file exceeds maximum allowed rows ({self.MAX_ROWS})"
+                self.results['errors'].append(error_msg)
+                logger.warning(error_msg)
+                break
+            
             try:
-                claim_id = int(item['id'])
-                
-                # Validate claim ID is positive
-                if claim_id <= 0:
-                    raise ValueError(f"Invalid claim ID: {claim_id}")
-                
-                # Parse date with better error handling
-                discharge_date = self._parse_date(item['discharge_date'], f"Item {i+1}")
-                
-                # Use safe decimal conversion
-                billed_amount = self.safe_decimal_conversion(item['billed_amount'], 'billed_amount')
-                paid_amount = self.safe_decimal_conversion(item['paid_amount'], 'paid_amount')
-                
-                # Validate status
-                valid_statuses = ['Paid', 'Denied', 'Under Review']
-                if item['status'] not in valid_statuses:
-                    raise ValueError(f"Invalid status: {item['status']}. Must be one of: {valid_statuses}")
-                
-                # Validate required fields are not empty
-                if not item.get('patient_name', '').strip():
-                    raise ValueError("Patient name is required")
-                if not item.get('insurer_name', '').strip():
-                    raise ValueError("Insurer name is required")
-                
-                # Create or update claim
-                claim, created = Claim.objects.get_or_create(
-                    id=claim_id,
-                    defaults={
-                        'patient_name': item['patient_name'].strip()[:255],  # Truncate to field limit
-                        'billed_amount': billed_amount,
-                        'paid_amount': paid_amount,
-                        'status': item['status'],
-                        'insurer_name': item['insurer_name'].strip()[:255],  # Truncate to field limit
-                        'discharge_date': discharge_date,
-                        'burger_combo_code': item.get('burger_combo_code', '')[:100],  # Truncate to field limit
-                    }
+                claim = self._build_claim(
+                    claim_id=item['id'],
+                    patient_name=item.get('patient_name'),
+                    billed_amount=item['billed_amount'],
+                    paid_amount=item['paid_amount'],
+                    status=item['status'],
+                    insurer_name=item.get('insurer_name'),
+                    discharge_date=item['discharge_date'],
+                    burger_combo_code=item.get('burger_combo_code'),
+                    context=f"Item {i+1}",
                 )
-                
-                if created:
-                    self.results['claims_created'] += 1
-                elif not append:
-                    # Update existing claim
-                    claim.patient_name = item['patient_name'].strip()[:255]
-                    claim.billed_amount = billed_amount
-                    claim.paid_amount = paid_amount
-                    claim.status = item['status']
-                    claim.insurer_name = item['insurer_name'].strip()[:255]
-                    claim.discharge_date = discharge_date
-                    claim.burger_combo_code = item.get('burger_combo_code', '')[:100]
-                    claim.save()
-                    self.results['claims_updated'] += 1
+                self._queue(pending, claim.id, claim, append)
+                if len(pending) >= self.BATCH_SIZE:
+                    self._flush_claims(pending, append)
                     
             except Exception as e:
-                error_msg = f'Item {i+1}: {str(e)}'
-                self.results['errors'].append(error_msg)
-                logger.error(error_msg)
+                self._record_error(f'Item {i+1}: {str(e)}')
+        
+        self._flush_claims(pending, append)
     
     def _import_details_csv(self, file, append=True):
         """Import claim details from CSV file"""
-        file.seek(0)
-        content = file.read().decode('utf-8')
-        reader = csv.DictReader(io.StringIO(content), delimiter='|')
+        reader = self._read_csv(file)
+        columns = self._column_index(next(reader, []))
+        claim_col, cpt_col = self._required_columns(columns, 'claim_id', 'cpt_codes')
+        denial_col = columns.get('denial_reason')
         
+        pending = {}
         for row_num, row in enumerate(reader, start=2):
             try:
-                claim_id = int(row['claim_id'])
-                
-                try:
-                    claim = Claim.objects.get(id=claim_id)
-                except Claim.DoesNotExist:
-                    self.results['errors'].append(f'Row {row_num}: Claim {claim_id} not found')
-                    continue
-                
-                # Create or update claim detail
-                detail, created = ClaimDetail.objects.get_or_create(
-                    claim=claim,
-                    defaults={
-                        'cpt_codes': row['cpt_codes'],
-                        'denial_reason': row.get('denial_reason', '') or None,
-                    }
+                claim_id = int(row[claim_col])
+                detail = ClaimDetail(
+                    claim_id=claim_id,
+                    cpt_codes=row[cpt_col],
+                    denial_reason=self._cell(row, denial_col) or None,
                 )
-                
-                if created:
-                    self.results['details_created'] += 1
-                elif not append:
-                    # Update existing detail
-                    detail.cpt_codes = row['cpt_codes']
-                    detail.denial_reason = row.get('denial_reason', '') or None
-                    detail.save()
-                    self.results['details_updated'] += 1
+                self._queue(pending, claim_id, (f'Row {row_num}', detail), append)
+                if len(pending) >= self.BATCH_SIZE:
+                    self._flush_details(pending, append)
                     
             except Exception as e:
-                self.results['errors'].append(f'Row {row_num}: {str(e)}')
+                self._record_error(f'Row {row_num}: {str(e)}')
+        
+        self._flush_details(pending, append)
     
     def _import_details_json(self, file, append=True):
         """Import claim details from JSON file"""
-        file.seek(0)
-        content = file.read().decode('utf-8')
-        data = json.loads(content)
-        
-        for i, item in enumerate(data):
+        pending = {}
+        for i, item in enumerate(self._read_json(file)):
             try:
                 claim_id = int(item['claim_id'])
-                
-                try:
-                    claim = Claim.objects.get(id=claim_id)
-                except Claim.DoesNotExist:
-                    self.results['errors'].append(f'Item {i+1}: Claim {claim_id} not found')
-                    continue
-                
-                # Create or update claim detail
-                detail, created = ClaimDetail.objects.get_or_create(
-                    claim=claim,
-                    defaults={
-                        'cpt_codes': item['cpt_codes'],
-                        'denial_reason': item.get('denial_reason', '') or None,
-                    }
+                detail = ClaimDetail(
+                    claim_id=claim_id,
+                    cpt_codes=item['cpt_codes'],
+                    denial_reason=item.get('denial_reason', '') or None,
                 )
-                
-                if created:
-                    self.results['details_created'] += 1
-                elif not append:
-                    # Update existing detail
-                    detail.cpt_codes = item['cpt_codes']
-                    detail.denial_reason = item.get('denial_reason', '') or None
-                    detail.save()
-                    self.results['details_updated'] += 1
+                self._queue(pending, claim_id, (f'Item {i+1}', detail), append)
+                if len(pending) >= self.BATCH_SIZE:
+                    self._flush_details(pending, append)
                     
             except Exception as e:
-                self.results['errors'].append(f'Item {i+1}: {str(e)}')
-
-
-def export_claims_to_json():
-    """Export all claims data to JSON format"""
-    claims_data = []
-    details_data = []
-    
-    for claim in Claim.objects.all():
-        claim_dict = {
-            'id': claim.id,
-            'patient_name': claim.patient_name,
-            'billed_amount': str(claim.billed_amount),
-            'paid_amount': str(claim.paid_amount),
-            'status': claim.status,
-            'insurer_name': claim.insurer_name,
-            'discharge_date': claim.discharge_date.strftime('%Y-%m-%d'),
-            'burger_combo_code': claim.burger_combo_code or '',
-        }
-        claims_data.append(claim_dict)
+                self._record_error(f'Item {i+1}: {str(e)}')
+        
+        self._flush_details(pending, append)
+    
+    def _read_csv(self, file):
+        """Yield non-blank pipe-delimited rows, decoding the upload as it is read rather than all at once"""
+        file.seek(0)
+        wrapper = io.TextIOWrapper(file.file, encoding='utf-8', newline='')
+        try:
+            # csv.reader returns [] for blank lines, which DictReader used to skip
+            for row in csv.reader(wrapper, delimiter='|'):
+                if row:
+                    yield row
+        finally:
+            # Detach so discarding the wrapper doesn't close the upload
+            wrapper.detach()
+    
+    def _read_json(self, file):
+        """Iterate the objects of a JSON array upload"""
+        file.seek(0)
+        if file.size <= self.JSON_STREAM_THRESHOLD:
+            # A single orjson parse is fastest while the whole document fits comfortably in memory
+            data = orjson.loads(file.read())
+            # Like ijson's 'item' prefix, anything but a top-level array yields no records
+            return data if isinstance(data, list) else []
+        # Larger files are streamed one object at a time; numbers arrive as int/Decimal
+        return ijson.items(file, 'item')
+    
+    def _column_index(self, header):
+        """Map CSV header names to their positions once per file"""
+        return {name: index for index, name in enumerate(header)}
+    
+    def _required_columns(self, columns, *names):
+        """Positions of the named CSV columns, failing once if any is missing"""
+        missing = [name for name in names if name not in columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        return [columns[name] for name in names]
+    
+    def _cell(self, row, index):
+        """Value at an optional column position, or '' when the column or cell is missing"""
+        if index is None or index >= len(row):
+            return ''
+        return row[index]
+    
+    def _queue(self, pending, key, value, append):
+        """Queue a record for the next flush; a repeated key only replaces it when updating"""
+        if append:
+            pending.setdefault(key, value)
+        else:
+            pending[key] = value
+    
+    def _insert_new(self, model, objs, label):
+        """
+        Insert an add-mode batch and return how many rows were written. If a row was inserted since
+        the existing-id lookup (e.g. by a concurrent import), retry row by row and record the conflicts as errors.
+        """
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(objs, batch_size=self.BATCH_SIZE)
+            return len(objs)
+        except IntegrityError:
+            logger.warning(f"{model.__name__} batch conflicted with existing rows; inserting row by row")
+        
+        inserted = 0
+        for obj in objs:
+            if model._meta.pk.auto_created:
+                # Drop ids assigned by the rolled-back bulk insert
+                obj.pk = None
+            try:
+                with transaction.atomic():
+                    obj.save(force_insert=True)
+                inserted += 1
+            except IntegrityError as e:
+                self._record_error(f'{label(obj)}: {str(e)}')
+        return inserted
+    
+    def _flush_claims(self, pending, append):
+        """Write queued claims; updates are a single INSERT ... ON CONFLICT DO UPDATE"""
+        if not pending:
+            return
+        
+        # One transaction per batch; inside an overwrite it joins the outer one
+        with transaction.atomic(savepoint=False):
+            # Only needed to report created vs updated counts
+            existing_ids = set(Claim.objects.filter(id__in=list(pending)).values_list('id', flat=True))
+            
+            if append:
+                new_claims = [claim for claim_id, claim in pending.items() if claim_id not in existing_ids]
+                created = self._insert_new(Claim, new_claims, lambda claim: f'Claim {claim.id}')
+            else:
+                # Upsert: insert new claims and update existing ones in the same statement
+                Claim.objects.bulk_create(
+                    list(pending.values()),
+                    batch_size=self.BATCH_SIZE,
+                    update_conflicts=True,
+                    unique_fields=['id'],
+                    update_fields=self.CLAIM_UPDATE_FIELDS,
+                )
+        
+        if append:
+            self.results['claims_created'] += created
+        else:
+            self.results['claims_updated'] += len(existing_ids)
+            self.results['claims_created'] += len(pending) - len(existing_ids)
+        
+        pending.clear()
+    
+    def _flush_details(self, pending, append):
+        """Write queued details, resolving claims and their existing details in one query"""
+        if not pending:
+            return
         
-        # Add details if they exist
-        if hasattr(claim, 'details'):
-            detail_dict = {
-                'claim_id': claim.id,
-                'cpt_codes': claim.details.cpt_codes,
-                'denial_reason': claim.details.denial_reason or '',
-            }
-            details_data.append(detail_dict)
-    
-    return claims_data, details_data
-
-
-def export_claims_to_csv():
-    """Export all claims data to CSV format"""
-    import io
-    
-    # Export claims
-    claims_output = io.StringIO()
-    claims_fieldnames = ['id', 'patient_name', 'billed_amount', 'paid_amount', 'status', 'insurer_name', 'discharge_date', 'burger_combo_code']
-    claims_writer = csv.DictWriter(claims_output, fieldnames=claims_fieldnames, delimiter='|')
-    claims_writer.writeheader()
-    
-    for claim in Claim.objects.all():
-        claims_writer.writerow({
-            'id': claim.id,
-            'patient_name': claim.patient_name,
-            'billed_amount': str(claim.billed_amount),
-            'paid_amount': str(claim.paid_amount),
-            'status': claim.status,
-            'insurer_name': claim.insurer_name,
-            'discharge_date': claim.discharge_date.strftime('%Y-%m-%d'),
-            'burger_combo_code': claim.burger_combo_code or '',
-        })
-    
-    # Export details
-    details_output = io.StringIO()
-    details_fieldnames = ['claim_id', 'cpt_codes', 'denial_reason']
-    details_writer = csv.DictWriter(details_output, fieldnames=details_fieldnames, delimiter='|')
-    details_writer.writeheader()
-    
-    for detail in ClaimDetail.objects.select_related('claim'):
-        details_writer.writerow({
-            'claim_id': detail.claim.id,
-            'cpt_codes': detail.cpt_codes,
-            'denial_reason': detail.denial_reason or '',
-        })
-    
-    return claims_output.getvalue(), details_output.getvalue()
+        # LEFT JOIN to the one-to-one detail: every referenced claim that exists, with its detail id if any.
+        # Details only need claim_id, so this stays a values_list() map rather than in_bulk() instances
+        claim_details = dict(Claim.objects.filter(id__in=list(pending)).values_list('id', 'details__id'))
+        claim_ids = claim_details.keys()
+        existing_ids = {claim_id for claim_id, detail_id in claim_details.items() if detail_id is not None}
+        
+        details = []
+        labels = {}
+        for claim_id, (label, detail) in pending.items():
+            if claim_id not in claim_ids:
+                self._record_error(f'{label}: Claim {claim_id} not found')
+            elif not append or claim_id not in existing_ids:
+                details.append(detail)
+                labels[claim_id] = label
+        
+        with transaction.atomic(savepoint=False):
+            if append:
+                created = self._insert_new(ClaimDetail, details, lambda detail: labels[detail.claim_id])
+            else:
+                # Upsert on the one-to-one claim column
+                ClaimDetail.objects.bulk_create(
+                    details,
+                    batch_size=self.BATCH_SIZE,
+                    update_conflicts=True,
+                    unique_fields=['claim'],
+                    update_fields=self.DETAIL_UPDATE_FIELDS,
+                )
+        
+        if append:
+            self.results['details_created'] += created
+        else:
+            self.results['details_created'] += len(details) - len(existing_ids)
+            self.results['details_updated'] += len(existing_ids)
+        
+        pending.clear()
+
+
+def _validate_claim_chunk(importer_class, numbered_rows, positions):
+    """Process pool entry point for DataImporter._validated_chunks"""
+    return importer_class()._validate_claim_rows(numbered_rows, positions)
+
+
+class Echo:
+    """File-like object that returns what is written, so csv.writer can feed a generator"""
+    
+    def write(self, value):
+        return value
+
+
+# Columns selected for export, in output order
+CLAIM_EXPORT_FIELDS = ['id', 'patient_name', 'billed_amount', 'paid_amount', 'status', 'insurer_name', 'discharge_date', 'burger_combo_code']
+DETAIL_EXPORT_FIELDS = ['claim_id', 'cpt_codes', 'denial_reason']
+# Rows fetched per round trip while streaming; on PostgreSQL iterator() reads
+# through a server-side cursor, so memory stays at one chunk however large the table
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _claim_export_rows(claims):
+    """Yield export dicts built from plain column values, without model instances"""
+    for row in claims.values(*CLAIM_EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row['billed_amount'] = str(row['billed_amount'])
+        row['paid_amount'] = str(row['paid_amount'])
+        row['discharge_date'] = row['discharge_date'].strftime('%Y-%m-%d')
+        row['burger_combo_code'] = row['burger_combo_code'] or ''
+        yield row
+
+
+def _detail_export_rows(details):
+    """Yield export dicts for claim details, reading claim_id without joining claims"""
+    for row in details.values(*DETAIL_EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row['denial_reason'] = row['denial_reason'] or ''
+        yield row
+
+
+def _json_array(rows, counts, key):
+    """Yield a JSON array one encoded element at a time, counting the elements"""
+    yield b'['
+    for index, row in enumerate(rows):
+        yield (b',\n    ' if index else b'\n    ') + orjson.dumps(row)
+        counts[key] = index + 1
+    yield b'\n  ]' if counts[key] else b']'
+
+
+def export_claims_to_json(claims=None, details=None):
+    """Stream all claims data as a UTF-8 JSON document, one record at a time"""
+    if claims is None:
+        claims = Claim.objects.all()
+    if details is None:
+        details = ClaimDetail.objects.all()
+    
+    counts = {'claims': 0, 'claim_details': 0}
+    export_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    yield b'{\n  "claims": '
+    yield from _json_array(_claim_export_rows(claims), counts, 'claims')
+    yield b',\n  "claim_details": '
+    yield from _json_array(_detail_export_rows(details), counts, 'claim_details')
+    # Totals are only known once the rows have been streamed
+    yield (
+        b',\n  "export_date": ' + orjson.dumps(export_date) + b','
+        + f'\n  "total_claims": {counts["claims"]},'
+          f'\n  "total_details": {counts["claim_details"]}\n}}\n'.encode()
+    )
+
+
+def _csv_rows(rows, fieldnames):
+    """Yield pipe-delimited CSV lines, header first, from value tuples"""
+    # csv.writer renders None as '' and str()s Decimals and dates (ISO format)
+    writer = csv.writer(Echo(), delimiter='|')
+    separators = len(fieldnames) - 1
+    yield writer.writerow(fieldnames)
+    for row in rows:
+        # Plain join unless a value would need quoting; matches csv.writer output
+        line = '|'.join(['' if value is None else str(value) for value in row])
+        if line.count('|') != separators or '"' in line or '\n' in line or '\r' in line:
+            yield writer.writerow(row)
+        else:
+            yield line + '\r\n'
+
+
+def export_claims_to_csv(claims=None):
+    """Stream claims as pipe-delimited CSV lines"""
+    if claims is None:
+        claims = Claim.objects.all()
+    rows = claims.values_list(*CLAIM_EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return _csv_rows(rows, CLAIM_EXPORT_FIELDS)
+
+
+def export_claim_details_to_csv(details=None):
+    """Stream claim details as pipe-delimited CSV lines"""
+    if details is None:
+        details = ClaimDetail.objects.all()
+    rows = details.values_list(*DETAIL_EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return _csv_rows(rows, DETAIL_EXPORT_FIELDS)
@@ -1,337 +1,395 @@
 import logging
+import re
+from functools import lru_cache, wraps
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, Http404
+from django.http import HttpResponse, JsonResponse, Http404
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Q, Sum, Count, Avg, F
-from django.db import DatabaseError, transaction
+from django.db.models import Q, Prefetch
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.contrib.postgres.search import SearchQuery
 from django.views.decorators.http import require_http_methods
 from django.template.loader import render_to_string
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.core.exceptions import ValidationError, PermissionDenied
 from .models import Claim, ClaimDetail, Flag, Note
+from .utils import CLAIMS_LIST_TIMEOUT, CachedCountPaginator, claims_list_cache_key, get_dashboard_stats
 
 logger = logging.getLogger('claims')
 
+# Notes and flags newest first, with their authors, in one query per relation
+NOTES_PREFETCH = Prefetch('notes', queryset=Note.objects.select_related('user').order_by('-created_at'))
+FLAGS_PREFETCH = Prefetch('flags', queryset=Flag.objects.select_related('user').order_by('-created_at'))
+
+# Claim columns rendered by the claims list table
+LIST_FIELDS = (
+    'id', 'patient_name', 'insurer_name', 'status', 'billed_amount', 'paid_amount',
+    'discharge_date', 'flag_count',
+)
+
 
 def is_admin_user(user):
     """Check if user is admin/superuser"""
     return user.is_authenticated and (user.is_superuser or user.is_staff)
 
 
+@lru_cache(maxsize=16)
+def _parse_page_size(raw):
+    """Return the requested page size if it is one of 10/20/50, else 10"""
+    try:
+        page_size = int(raw)
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid page_size parameter: {raw}")
+        return 10
+    return page_size if page_size in (10, 20, 50) else 10
+
+
+def handle_db_errors(view=None, *, error_page=None):
+    """
+    Log a DatabaseError or unexpected exception raised anywhere in the view and answer with a JSON 500.
+    Full-page requests get error_page(request) instead, when given, with the error as a message.
+    Http404 and PermissionDenied are left to Django.
+    """
+    if view is None:
+        return lambda view: handle_db_errors(view, error_page=error_page)
+    
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except (Http404, PermissionDenied):
+            raise
+        except DatabaseError as e:
+            logger.error(f"Database error in {view.__name__}: {str(e)}", exc_info=True)
+            error = "We're experiencing database issues. Please try again."
+        except Exception as e:
+            logger.error(f"Unexpected error in {view.__name__}: {str(e)}", exc_info=True)
+            error = 'Something went wrong. Please try again.'
+        if error_page is not None and not request.headers.get('HX-Request'):
+            messages.error(request, error)
+            return error_page(request)
+        return JsonResponse({'error': error}, status=500)
+    return wrapper
+
+
+def prefix_search_query(search_query):
+    """
+    Build a raw tsquery that ANDs the words of search_query and prefix-matches the last one,
+    so live search matches partially typed names ("Virg" finds "Virginia"). None if there are no words.
+    """
+    # \w+ tokens can't carry tsquery operators, so user input never breaks the query syntax
+    words = re.findall(r'\w+', search_query)
+    if not words:
+        return None
+    words[-1] += ':*'
+    return ' & '.join(words)
+
+
+def paginate_by_id(queryset, after_id, page_size):
+    """Return a page of claims below after_id in -id order, plus the after_id of the next page (or None)"""
+    if after_id is not None:
+        queryset = queryset.filter(id__lt=after_id)
+    # One extra row tells whether there is a next page
+    rows = list(queryset.order_by('-id')[:page_size + 1])
+    next_after_id = rows[page_size - 1].id if len(rows) > page_size else None
+    return rows[:page_size], next_after_id
+
+
+def empty_claims_list(request):
+    """The claims list page without rows, shown when the claims couldn't be loaded"""
+    return render(request, 'claims/claims_list.html', {
+        'claims': [],
+        'search_query': '',
+        'status_filter': '',
+        'status_choices': Claim.status_choices,
+        'page_size': 10,
+    })
+
+
 @login_required
+@handle_db_errors(error_page=empty_claims_list)
 def claims_list(request):
     """Main claims list view with search, filter, and pagination functionality"""
-    try:
-        logger.debug(f"Claims list requested by user {request.user.username}")
-        
-        claims = Claim.objects.select_related('details').prefetch_related('flags', 'notes')
-        
-        # Search functionality with input validation
-        search_query = request.GET.get('search', '').strip()
-        if len(search_query) > 200:  # Prevent overly long search queries
-            search_query = search_query[:200]
-            messages.warning(request, "Search query was truncated to 200 characters")
-        
-        if search_query:
-            claims = claims.filter(
-                Q(patient_name__icontains=search_query) |
-                Q(insurer_name__icontains=search_query)
-            )
-        
-        # Filter by status with validation
-        status_filter = request.GET.get('status', '')
-        valid_statuses = ['Paid', 'Denied', 'Under Review']
-        if status_filter and status_filter not in valid_statuses:
-            logger.warning(f"Invalid status filter attempted: {status_filter}")
-            status_filter = ''
-        
-        if status_filter:
-            claims = claims.filter(status=status_filter)
-        
-        # Order by claim ID descending
-        claims = claims.order_by('-id')
-        
-        # Pagination with validation
-        page_size = request.GET.get('page_size', '10')
+    logger.debug(f"Claims list requested by user {request.user.username}")
+    
+    # The table renders only LIST_FIELDS: no details join, no related prefetches, no search_vector
+    claims = Claim.objects.only(*LIST_FIELDS)
+    
+    # Search functionality with input validation
+    search_query = request.GET.get('search', '').strip()
+    if len(search_query) > 200:  # Prevent overly long search queries
+        search_query = search_query[:200]
+        messages.warning(request, "Search query was truncated to 200 characters")
+    
+    # ?match=contains keeps the substring search, e.g. for partial names
+    search_match = request.GET.get('match', '')
+    if search_match != 'contains':
+        search_match = ''
+    
+    tsquery = prefix_search_query(search_query) if connection.vendor == 'postgresql' else None
+    if search_query and tsquery and not search_match:
+        # A single GIN lookup on the trigger-maintained tsvector instead of two ORed pattern matches;
+        # 'simple' matches the trigger's config, so the :* prefix is compared with unstemmed names
+        claims = claims.filter(
+            search_vector=SearchQuery(tsquery, config='simple', search_type='raw')
+        )
+    elif search_query:
+        # icontains compiles to UPPER(col::text) LIKE UPPER(%s) on PostgreSQL, which is exactly the
+        # expression of the claim_*_trgm GIN indexes; wrapping the column (e.g. unaccent) would bypass them
+        claims = claims.filter(
+            Q(patient_name__icontains=search_query) |
+            Q(insurer_name__icontains=search_query)
+        )
+    
+    # Filter by status with validation
+    status_filter = request.GET.get('status', '')
+    valid_statuses = ['Paid', 'Denied', 'Under Review']
+    if status_filter and status_filter not in valid_statuses:
+        logger.warning(f"Invalid status filter attempted: {status_filter}")
+        status_filter = ''
+    
+    if status_filter:
+        claims = claims.filter(status=status_filter)
+    
+    # Order by claim ID descending; with a status filter claim_status_id_idx returns rows already sorted
+    claims = claims.order_by('-id')
+    
+    # Pagination with validation
+    page_size = _parse_page_size(request.GET.get('page_size', '10'))
+    
+    page = request.GET.get('page')
+    after_id = request.GET.get('after_id')
+    
+    # HTMX table refreshes repeat the same filter/page combinations; serve those from the cache
+    is_htmx = bool(request.headers.get('HX-Request'))
+    cache_partial = is_htmx and settings.CLAIMS_LIST_CACHE_PARTIALS
+    if cache_partial:
+        cache_key = claims_list_cache_key((search_query, search_match, status_filter, page, after_id, page_size))
+        cached_html = cache.get(cache_key)
+        if cached_html is not None:
+            return HttpResponse(cached_html)
+    
+    # The count is cached per search/status combination
+    paginator = CachedCountPaginator(claims, page_size, filters=(search_query, search_match, status_filter))
+    keyset = None
+    
+    if settings.CLAIMS_KEYSET_PAGINATION and page is None:
+        # Seek past the last id shown instead of OFFSET, so deep pages cost the same as the first
         try:
-            page_size = int(page_size)
-            if page_size not in [10, 20, 50]:
-                page_size = 10
+            after_id = int(after_id) if after_id else None
         except (ValueError, TypeError):
-            logger.warning(f"Invalid page_size parameter: {page_size}")
-            page_size = 10
-        
-        paginator = Paginator(claims, page_size)
-        page = request.GET.get('page', 1)
+            logger.warning(f"Invalid after_id parameter: {after_id}")
+            after_id = None
         
+        claims_page, next_after_id = paginate_by_id(claims, after_id, page_size)
+        if after_id is None and next_after_id is None:
+            # Every match fits on the first page (typical once a search narrows), so skip COUNT(*)
+            count = len(claims_page)
+        else:
+            count = paginator.count
+        keyset = {
+            'after_id': after_id,
+            'next_after_id': next_after_id,
+            'count': count,
+        }
+    else:
         try:
-            claims_page = paginator.page(page)
+            claims_page = paginator.page(page or 1)
         except PageNotAnInteger:
             logger.warning(f"Invalid page number: {page}")
             claims_page = paginator.page(1)
         except EmptyPage:
             logger.warning(f"Empty page requested: {page}")
             claims_page = paginator.page(paginator.num_pages)
-        
-        # For HTMX requests, return only the table content (rows + pagination)
-        if request.headers.get('HX-Request'):
-            return render(request, 'claims/partials/claims_table_content.html', {
-                'claims': claims_page,
-                'search_query': search_query,
-                'status_filter': status_filter,
-                'page_size': page_size,
-            })
-        
-        # Get available statuses for filter dropdown
-        status_choices = Claim.status_choices
-        
-        context = {
+    
+    # For HTMX requests, return only the table content (rows + pagination)
+    if is_htmx:
+        html = render_to_string('claims/partials/claims_table_content.html', {
             'claims': claims_page,
+            'keyset': keyset,
             'search_query': search_query,
+            'search_match': search_match,
             'status_filter': status_filter,
-            'status_choices': status_choices,
             'page_size': page_size,
-        }
-        
-        return render(request, 'claims/claims_list.html', context)
-        
-    except DatabaseError as e:
-        logger.error(f"Database error in claims_list: {str(e)}", exc_info=True)
-        messages.error(request, "We're experiencing database issues. Please try refreshing the page or contact support if the problem persists.")
-        return render(request, 'claims/claims_list.html', {
-            'claims': [],
-            'search_query': '',
-            'status_filter': '',
-            'status_choices': Claim.status_choices,
-            'page_size': 10,
-        })
-    except Exception as e:
-        logger.error(f"Unexpected error in claims_list: {str(e)}", exc_info=True)
-        messages.error(request, "Something went wrong while loading claims. Please try refreshing the page.")
-        return render(request, 'claims/claims_list.html', {
-            'claims': [],
-            'search_query': '',
-            'status_filter': '',
-            'status_choices': Claim.status_choices,
-            'page_size': 10,
-        })
+        }, request=request)
+        if cache_partial:
+            cache.set(cache_key, html, CLAIMS_LIST_TIMEOUT)
+        return HttpResponse(html)
+    
+    # Get available statuses for filter dropdown
+    status_choices = Claim.status_choices
+    
+    context = {
+        'claims': claims_page,
+        'keyset': keyset,
+        'search_query': search_query,
+        'search_match': search_match,
+        'status_filter': status_filter,
+        'status_choices': status_choices,
+        'page_size': page_size,
+    }
+    
+    return render(request, 'claims/claims_list.html', context)
 
 
 @login_required
+@handle_db_errors
 def claim_detail(request, claim_id):
     """HTMX view for claim details"""
+    # Validate claim_id parameter
     try:
-        # Validate claim_id parameter
-        try:
-            claim_id = int(claim_id)
-            if claim_id <= 0:
-                raise ValueError("Invalid claim ID")
-        except (ValueError, TypeError):
-            logger.warning(f"Invalid claim_id parameter: {claim_id}")
-            raise Http404("Invalid claim ID")
-        
-        logger.debug(f"Fetching claim detail for ID {claim_id} by user {request.user.username}")
-        
-        try:
-            claim = get_object_or_404(Claim, id=claim_id)
-        except Claim.DoesNotExist:
-            logger.info(f"Claim {claim_id} not found")
-            raise Http404("Claim not found")
-        
-        try:
-            claim_details = claim.details
-        except ClaimDetail.DoesNotExist:
-            logger.debug(f"No details found for claim {claim_id}")
-            claim_details = None
-        except Exception as e:
-            logger.error(f"Error fetching claim details for {claim_id}: {str(e)}")
-            claim_details = None
-        
-        # Get notes and flags with proper error handling
-        try:
-            notes = claim.notes.select_related('user').order_by('-created_at')
-            flags = claim.flags.select_related('user').order_by('-created_at')
-        except DatabaseError as e:
-            logger.error(f"Database error fetching notes/flags for claim {claim_id}: {str(e)}")
-            notes = Note.objects.none()
-            flags = Flag.objects.none()
-        
-        # Check if current user has flagged this claim
-        try:
-            user_has_flagged = flags.filter(user=request.user).exists() if request.user.is_authenticated else False
-        except DatabaseError as e:
-            logger.error(f"Error checking user flags for claim {claim_id}: {str(e)}")
-            user_has_flagged = False
-        
-        context = {
-            'claim': claim,
-            'claim_details': claim_details,
-            'notes': notes,
-            'flags': flags,
-            'user_has_flagged': user_has_flagged,
-        }
-        
-        return render(request, 'claims/partials/claim_detail.html', context)
-        
-    except Http404:
-        raise  # Re-raise 404 errors
-    except DatabaseError as e:
-        logger.error(f"Database error in claim_detail for ID {claim_id}: {str(e)}", exc_info=True)
-        return JsonResponse({
-            'error': 'Unable to load claim details due to database issues. Please try again.'
-        }, status=500)
-    except Exception as e:
-        logger.error(f"Unexpected error in claim_detail for ID {claim_id}: {str(e)}", exc_info=True)
-        return JsonResponse({
-            'error': 'Sorry, we couldn\'t load this claim\'s details. Please try again.'
-        }, status=500)
+        claim_id = int(claim_id)
+        if claim_id <= 0:
+            raise ValueError("Invalid claim ID")
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid claim_id parameter: {claim_id}")
+        raise Http404("Invalid claim ID")
+    
+    logger.debug(f"Fetching claim detail for ID {claim_id} by user {request.user.username}")
+    
+    try:
+        claim = get_object_or_404(
+            Claim.objects.select_related('details').prefetch_related(NOTES_PREFETCH, FLAGS_PREFETCH),
+            id=claim_id,
+        )
+    except Claim.DoesNotExist:
+        logger.info(f"Claim {claim_id} not found")
+        raise Http404("Claim not found")
+    
+    try:
+        claim_details = claim.details
+    except ClaimDetail.DoesNotExist:
+        logger.debug(f"No details found for claim {claim_id}")
+        claim_details = None
+    
+    # Notes and flags were prefetched with the claim
+    notes = claim.notes.all()
+    flags = claim.flags.all()
+    
+    # Check if current user has flagged this claim, from the prefetched flags
+    user_has_flagged = any(flag.user_id == request.user.id for flag in flags)
+    
+    context = {
+        'claim': claim,
+        'claim_details': claim_details,
+        'notes': notes,
+        'flags': flags,
+        'user_has_flagged': user_has_flagged,
+    }
+    
+    return render(request, 'claims/partials/claim_detail.html', context)
 
 
 @login_required
 @require_http_methods(["POST"])
+@handle_db_errors
 def flag_claim(request, claim_id):
     """HTMX view to flag a claim"""
+    # Validate claim_id parameter
     try:
-        # Validate claim_id parameter
-        try:
-            claim_id = int(claim_id)
-            if claim_id <= 0:
-                raise ValueError("Invalid claim ID")
-        except (ValueError, TypeError):
-            logger.warning(f"Invalid claim_id parameter in flag_claim: {claim_id}")
-            return JsonResponse({'error': 'Invalid claim ID'}, status=400)
-        
-        logger.info(f"User {request.user.username} attempting to flag claim {claim_id}")
-        
-        try:
-            claim = get_object_or_404(Claim, id=claim_id)
-        except Claim.DoesNotExist:
+        claim_id = int(claim_id)
+        if claim_id <= 0:
+            raise ValueError("Invalid claim ID")
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid claim_id parameter in flag_claim: {claim_id}")
+        return JsonResponse({'error': 'Invalid claim ID'}, status=400)
+    
+    logger.info(f"User {request.user.username} attempting to flag claim {claim_id}")
+    
+    # Insert straight away: the unique (claim, user) constraint rejects repeat flags
+    # and the claim FK rejects unknown ids, so the common path is a single INSERT
+    try:
+        # The INSERT and the flag_count update from its post_save commit together
+        with transaction.atomic():
+            Flag.objects.create(claim_id=claim_id, user=request.user, reason='Flagged for review')
+        created = True
+        logger.info(f"Claim {claim_id} flagged by user {request.user.username}")
+    except IntegrityError:
+        # Only a rejected INSERT pays for telling the two constraints apart
+        if not Flag.objects.filter(claim_id=claim_id, user=request.user).exists():
             logger.info(f"Claim {claim_id} not found for flagging")
             return JsonResponse({'error': 'Claim not found'}, status=404)
-        
-        # Create flag if it doesn't exist with transaction safety
-        try:
-            with transaction.atomic():
-                flag, created = Flag.objects.get_or_create(
-                    claim=claim,
-                    user=request.user,
-                    defaults={'reason': 'Flagged for review'}
-                )
-            
-            if created:
-                logger.info(f"Claim {claim_id} flagged by user {request.user.username}")
-            else:
-                logger.debug(f"Claim {claim_id} already flagged by user {request.user.username}")
-                
-        except DatabaseError as e:
-            logger.error(f"Database error flagging claim {claim_id}: {str(e)}", exc_info=True)
-            return JsonResponse({'error': 'Database error occurred'}, status=500)
-        
-        # Get updated notes and annotations with error handling
-        try:
-            notes = claim.notes.select_related('user').order_by('-created_at')
-            flags = claim.flags.select_related('user').order_by('-created_at')
-        except DatabaseError as e:
-            logger.error(f"Database error fetching notes/flags after flagging claim {claim_id}: {str(e)}")
-            notes = Note.objects.none()
-            flags = Flag.objects.none()
-        
-        user_has_flagged = True
-        
-        context = {
-            'claim': claim,
-            'notes': notes,
-            'flags': flags,
-            'user_has_flagged': user_has_flagged,
-            'flag_created': created,
-        }
-        
-        return render(request, 'claims/partials/notes_annotations.html', context)
-        
-    except Exception as e:
-        logger.error(f"Unexpected error in flag_claim for ID {claim_id}: {str(e)}", exc_info=True)
-        return JsonResponse({'error': 'An unexpected error occurred'}, status=500)
+        created = False
+        logger.debug(f"Claim {claim_id} already flagged by user {request.user.username}")
+    
+    # Get updated notes and annotations
+    notes = list(NOTES_PREFETCH.queryset.filter(claim_id=claim_id))
+    flags = list(FLAGS_PREFETCH.queryset.filter(claim_id=claim_id))
+    
+    user_has_flagged = True
+    
+    context = {
+        'notes': notes,
+        'flags': flags,
+        'user_has_flagged': user_has_flagged,
+        'flag_created': created,
+    }
+    
+    return render(request, 'claims/partials/notes_annotations.html', context)
 
 
 @login_required
 @require_http_methods(["POST"])
+@handle_db_errors
 def add_note(request, claim_id):
     """HTMX view to add a note to a claim"""
+    # Validate claim_id parameter
     try:
-        # Validate claim_id parameter
-        try:
-            claim_id = int(claim_id)
-            if claim_id <= 0:
-                raise ValueError("Invalid claim ID")
-        except (ValueError, TypeError):
-            logger.warning(f"Invalid claim_id parameter in add_note: {claim_id}")
-            return JsonResponse({'error': 'Invalid claim ID'}, status=400)
-        
-        logger.debug(f"User {request.user.username} attempting to add note to claim {claim_id}")
-        
+        claim_id = int(claim_id)
+        if claim_id <= 0:
+            raise ValueError("Invalid claim ID")
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid claim_id parameter in add_note: {claim_id}")
+        return JsonResponse({'error': 'Invalid claim ID'}, status=400)
+    
+    logger.debug(f"User {request.user.username} attempting to add note to claim {claim_id}")
+    
+    # Validate and sanitize note text
+    note_text = request.POST.get('note_text', '').strip()
+    if len(note_text) > 5000:  # Match model constraint
+        logger.warning(f"Note text too long for claim {claim_id}: {len(note_text)} characters")
+        note_text = note_text[:5000]
+    
+    note_added = False
+    if note_text:
         try:
-            claim = get_object_or_404(Claim, id=claim_id)
-        except Claim.DoesNotExist:
+            # The claim FK rejects unknown ids when the transaction commits
+            with transaction.atomic():
+                Note.objects.create(
+                    claim_id=claim_id,
+                    user=request.user,
+                    text=note_text
+                )
+            note_added = True
+            logger.info(f"Note added to claim {claim_id} by user {request.user.username}")
+            
+        except IntegrityError:
             logger.info(f"Claim {claim_id} not found for adding note")
             return JsonResponse({'error': 'Claim not found'}, status=404)
-        
-        # Validate and sanitize note text
-        note_text = request.POST.get('note_text', '').strip()
-        if len(note_text) > 5000:  # Match model constraint
-            logger.warning(f"Note text too long for claim {claim_id}: {len(note_text)} characters")
-            note_text = note_text[:5000]
-        
-        note_added = False
-        if note_text:
-            try:
-                with transaction.atomic():
-                    Note.objects.create(
-                        claim=claim,
-                        user=request.user,
-                        text=note_text
-                    )
-                note_added = True
-                logger.info(f"Note added to claim {claim_id} by user {request.user.username}")
-                
-            except ValidationError as e:
-                logger.error(f"Validation error adding note to claim {claim_id}: {str(e)}")
-                return JsonResponse({
-                    'error': 'Unable to save your note. Please check the content and try again.'
-                }, status=400)
-            except DatabaseError as e:
-                logger.error(f"Database error adding note to claim {claim_id}: {str(e)}", exc_info=True)
-                return JsonResponse({
-                    'error': 'Failed to save note due to database issues. Please try again.'
-                }, status=500)
-        else:
-            logger.debug(f"Empty note text submitted for claim {claim_id}")
-        
-        # Get updated notes and annotations with error handling
-        try:
-            notes = claim.notes.select_related('user').order_by('-created_at')
-            flags = claim.flags.select_related('user').order_by('-created_at')
-            user_has_flagged = flags.filter(user=request.user).exists()
-        except DatabaseError as e:
-            logger.error(f"Database error fetching notes/flags after adding note to claim {claim_id}: {str(e)}")
-            notes = Note.objects.none()
-            flags = Flag.objects.none()
-            user_has_flagged = False
-        
-        context = {
-            'claim': claim,
-            'notes': notes,
-            'flags': flags,
-            'user_has_flagged': user_has_flagged,
-            'note_added': note_added,
-        }
-        
-        return render(request, 'claims/partials/notes_annotations.html', context)
-        
-    except Exception as e:
-        logger.error(f"Unexpected error in add_note for ID {claim_id}: {str(e)}", exc_info=True)
-        return JsonResponse({'error': 'An unexpected error occurred'}, status=500)
+        except ValidationError as e:
+            logger.error(f"Validation error adding note to claim {claim_id}: {str(e)}")
+            return JsonResponse({
+                'error': 'Unable to save your note. Please check the content and try again.'
+            }, status=400)
+    else:
+        logger.debug(f"Empty note text submitted for claim {claim_id}")
+    
+    # Get updated notes and annotations
+    notes = list(NOTES_PREFETCH.queryset.filter(claim_id=claim_id))
+    flags = list(FLAGS_PREFETCH.queryset.filter(claim_id=claim_id))
+    user_has_flagged = any(flag.user_id == request.user.id for flag in flags)
+    
+    context = {
+        'notes': notes,
+        'flags': flags,
+        'user_has_flagged': user_has_flagged,
+        'note_added': note_added,
+    }
+    
+    return render(request, 'claims/partials/notes_annotations.html', context)
 
 
 @login_required
@@ -341,24 +399,8 @@ def dashboard(request):
     if not is_admin_user(request.user):
         messages.error(request, 'Access denied. You need administrator privileges to view the dashboard.')
         return redirect('claims:claims_list')
-    # Calculate statistics
-    stats = {
-        'total_claims': Claim.objects.count(),
-        'total_flagged': Flag.objects.values('claim').distinct().count(),
-        'total_billed': Claim.objects.aggregate(Sum('billed_amount'))['billed_amount__sum'] or 0,
-        'total_paid': Claim.objects.aggregate(Sum('paid_amount'))['paid_amount__sum'] or 0,
-    }
-    
-    # Calculate average underpayment and outstanding amount
-    stats['avg_underpayment'] = Claim.objects.aggregate(
-        avg_underpayment=Avg(F('billed_amount') - F('paid_amount'))
-    )['avg_underpayment'] or 0
-    
-    # Calculate outstanding amount (total billed - total paid)
-    stats['outstanding_amount'] = stats['total_billed'] - stats['total_paid']
-    
-    # Status breakdown
-    status_breakdown = Claim.objects.values('status').annotate(count=Count('id')).order_by('status')
+    # Claim totals and the status breakdown are cached; only the recent lists are read per request
+    stats = get_dashboard_stats()
     
     # Recent flags and notes
     recent_flags = Flag.objects.select_related('claim', 'user').order_by('-created_at')[:10]
@@ -366,7 +408,7 @@ def dashboard(request):
     
     context = {
         'stats': stats,
-        'status_breakdown': status_breakdown,
+        'status_breakdown': stats['status_breakdown'],
         'recent_flags': recent_flags,
         'recent_notes': recent_notes,
     }
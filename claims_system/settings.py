@@ -109,8 +109,14 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compile each template once per process; the runserver autoreloader still resets it on edits
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -141,6 +147,24 @@ if not DEBUG:
     os.makedirs(db_path.parent, exist_ok=True)
 
 
+# With REDIS_URL every gunicorn worker and management command shares one cache, so invalidations
+# reach all of them; otherwise (development) each process keeps its own in-memory cache
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -191,6 +215,17 @@ LOGIN_REDIRECT_URL = '/claims/'
 LOGOUT_REDIRECT_URL = '/login/'
 LOGIN_URL = '/login/'
 
+# Claims list: page with ?after_id= (keyset) by default; ?page=N links keep working
+CLAIMS_KEYSET_PAGINATION = os.environ.get('CLAIMS_KEYSET_PAGINATION', 'True') == 'True'
+# Claims list: serve repeated HTMX table refreshes from the cache. Only safe with a shared cache,
+# since a per-process cache keeps serving partials that another worker's writes have retired
+CLAIMS_LIST_CACHE_PARTIALS = os.environ.get('CLAIMS_LIST_CACHE_PARTIALS', str(bool(REDIS_URL))) == 'True'
+
+# Data import: rows written per bulk INSERT / upsert statement
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '1000'))
+# Data import: processes used to validate large CSV uploads (1 = validate in the request process)
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', '1'))
+
 # Logging Configuration
 LOGGING = {
     'version': 1,